@@ -2,25 +2,22 @@
 Analyze sentiment distribution in the financial dataset.
 """
 import os
-import json
-from collections import Counter
-from pathlib import Path
-import sys
+import orjson
+import numpy as np
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config_utils import load_config
 
 def load_json_files(directory):
     """Load all JSON files from a directory."""
     data = []
-    for file in os.listdir(directory):
-        if file.endswith('.json'):
-            with open(os.path.join(directory, file), 'r', encoding='utf-8') as f:
-                try:
-                    data.append(json.load(f))
-                except json.JSONDecodeError:
-                    print(f"Error reading {file}")
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file():
+                with open(entry.path, 'rb') as f:
+                    try:
+                        data.append(orjson.loads(f.read()))
+                    except orjson.JSONDecodeError:
+                        print(f"Error reading {entry.name}")
     return data
 
 def analyze_sentiment_distribution():
@@ -34,44 +31,58 @@ def analyze_sentiment_distribution():
         "sec_filings": os.path.join(base_dir, "sec_filings"),
     }
     
-    # Sentiment mapping
+    # Sentiment mapping; anything unrecognised is counted as "unknown"
     sentiment_map = {0: "negative", 1: "neutral", 2: "positive"}
+    sentiment_labels = ["negative", "neutral", "positive", "unknown"]
+    code_of = {label: code for code, label in enumerate(sentiment_labels)}
+    code_of.update({code: code for code in sentiment_map})
+    unknown_code = code_of["unknown"]
     
     # Analyze each source
     for source_name, directory in sources.items():
         print(f"\nAnalyzing {source_name} data...")
         
         # Load data from JSON file
-        with open(os.path.join(directory, "sentiment_analysis.json"), "r") as f:
-            data = json.load(f)
+        with open(os.path.join(directory, "sentiment_analysis.json"), "rb") as f:
+            data = orjson.loads(f.read())
         
-        for item in data:
-            if isinstance(item, dict):
-                # Extract text based on source
-                if source_name == "sec_filings":
-                    text = item.get('text', '')
-                
-                # Extract sentiment if available
-                sentiment = item.get('sentiment', 'unknown')
-                if isinstance(sentiment, int) and sentiment in sentiment_map:
-                    sentiment = sentiment_map[sentiment]
-                
-                if text:
-                    texts.append(text)
-                    sentiments.append(sentiment)
+        # Extract text based on source
+        items = [
+            item for item in data
+            if isinstance(item, dict) and source_name == "sec_filings" and item.get('text')
+        ]
+        
+        # Histogram of integer sentiment codes
+        codes = np.fromiter(
+            (code_of.get(item.get('sentiment', 'unknown'), unknown_code) for item in items),
+            dtype=np.int8,
+            count=len(items)
+        )
+        sentiment_counts = np.bincount(codes, minlength=len(sentiment_labels))
+        
+        # Keep the first two samples of each sentiment, stopping once all are found
+        samples = {code: [] for code in np.flatnonzero(sentiment_counts).tolist()}
+        remaining = sum(min(2, sentiment_counts[code]) for code in samples)
+        for item, code in zip(items, codes.tolist()):
+            if remaining == 0:
+                break
+            if len(samples[code]) < 2:
+                samples[code].append(item['text'])
+                remaining -= 1
         
         # Print statistics
-        print(f"Total documents: {len(texts)}")
-        sentiment_counts = Counter(sentiments)
+        total = len(items)
+        print(f"Total documents: {total}")
         print("Sentiment distribution:")
-        for sentiment, count in sentiment_counts.most_common():
-            print(f"  {sentiment}: {count} ({count/len(sentiments)*100:.1f}%)")
+        for code in np.argsort(-sentiment_counts, kind='stable'):
+            count = sentiment_counts[code]
+            if count:
+                print(f"  {sentiment_labels[code]}: {count} ({count/total*100:.1f}%)")
         
         # Print sample texts for each sentiment
         print("\nSample texts for each sentiment:")
-        for sentiment in sentiment_counts.keys():
-            sample_texts = [text for text, sent in zip(texts, sentiments) if sent == sentiment][:2]
-            print(f"\n{sentiment.upper()} samples:")
+        for code, sample_texts in samples.items():
+            print(f"\n{sentiment_labels[code].upper()} samples:")
             for text in sample_texts:
                 print(f"  - {text[:200]}...")
 
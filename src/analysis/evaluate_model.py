@@ -2,14 +2,8 @@
 Evaluate the fine-tuned model's performance on a labeled dataset of financial texts.
 """
 import os
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from pathlib import Path
 import sys
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config_utils import load_config
 
 def load_model_and_tokenizer():
@@ -20,18 +14,60 @@ def load_model_and_tokenizer():
         print("Please run the training script first: python src/training/train_finbert.py")
         sys.exit(1)
     
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModelForSequenceClassification.from_pretrained(model_path)
-    return model, tokenizer
+    # Import torch/transformers only once we know there is a model to load
+    from src.utils.model_utils import (
+        ONNX_MODEL_PATH, configure_torch_threads, get_model_and_tokenizer, get_onnx_model_and_tokenizer,
+        onnx_export_is_current
+    )
+    configure_torch_threads()
+    
+    # Prefer the optimized ONNX export when src/analysis/export_onnx.py has been run
+    # since the model was last trained
+    if onnx_export_is_current(ONNX_MODEL_PATH, model_path):
+        return get_onnx_model_and_tokenizer(ONNX_MODEL_PATH)
+    if os.path.exists(ONNX_MODEL_PATH):
+        print("ONNX export is older than the fine-tuned model; using the PyTorch model. "
+              "Re-run src/analysis/export_onnx.py to refresh it.")
+    return get_model_and_tokenizer(model_path)
 
 def predict(texts, model, tokenizer):
-    """Predict sentiment for a list of texts."""
-    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+    """Predict sentiment for a list of texts using length-sorted batches."""
+    from src.utils.model_utils import predict_logits
+    
+    logits = predict_logits(texts, model, tokenizer)
+    predictions = logits.softmax(dim=-1)
     return predictions.argmax(dim=-1)
 
+def compute_metrics(true_labels, predicted_labels, num_labels):
+    """
+    Compute accuracy and support-weighted precision, recall and F1 from a confusion matrix.
+    Matches sklearn's average='weighted' with zero_division=0.
+    """
+    import torch
+    
+    y_true = torch.as_tensor(true_labels, dtype=torch.long)
+    y_pred = torch.as_tensor(predicted_labels, dtype=torch.long).cpu()
+    
+    # confusion[i, j] counts examples with true label i predicted as j
+    confusion = torch.bincount(y_true * num_labels + y_pred, minlength=num_labels ** 2)
+    confusion = confusion.reshape(num_labels, num_labels).double()
+    
+    true_positives = confusion.diag()
+    support = confusion.sum(dim=1)
+    predicted_positives = confusion.sum(dim=0)
+    
+    precision = true_positives / predicted_positives.clamp(min=1)
+    recall = true_positives / support.clamp(min=1)
+    f1 = 2 * precision * recall / (precision + recall).clamp(min=1e-12)
+    
+    weights = support / support.sum()
+    return {
+        'accuracy': float(true_positives.sum() / confusion.sum()),
+        'precision': float((precision * weights).sum()),
+        'recall': float((recall * weights).sum()),
+        'f1': float((f1 * weights).sum())
+    }
+
 def evaluate_model_performance():
     """
     Test model performance on a labeled dataset of financial texts.
@@ -66,17 +102,16 @@ def evaluate_model_performance():
     predicted_labels = predict(texts, model, tokenizer)
     
     # Calculate metrics
-    precision, recall, f1, _ = precision_recall_fscore_support(true_labels, predicted_labels, average='weighted')
-    accuracy = accuracy_score(true_labels, predicted_labels)
+    metrics = compute_metrics(true_labels, predicted_labels, model.config.num_labels)
     
     # Print results
     print("="*50)
     print("Model Performance Evaluation")
     print("="*50)
-    print(f"Accuracy: {accuracy:.2%}")
-    print(f"Precision: {precision:.2%}")
-    print(f"Recall: {recall:.2%}")
-    print(f"F1-Score: {f1:.2%}")
+    print(f"Accuracy: {metrics['accuracy']:.2%}")
+    print(f"Precision: {metrics['precision']:.2%}")
+    print(f"Recall: {metrics['recall']:.2%}")
+    print(f"F1-Score: {metrics['f1']:.2%}")
     print("\nNote: These results are based on a small example dataset.")
     print("For a true measure of performance, a larger labeled test set is required.")
     print("="*50)
@@ -2,14 +2,8 @@
 Run inference on a few example financial texts to demonstrate the model's capabilities.
 """
 import os
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from pathlib import Path
 import sys
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
 def load_model_and_tokenizer():
     """Load the fine-tuned model and tokenizer."""
     model_path = "data/finetuned_models/financial_llm"
@@ -17,23 +11,38 @@ def load_model_and_tokenizer():
         print(f"Error: Model not found at {model_path}")
         print("Please run the training script first: python src/training/train_finbert.py")
         sys.exit(1)
-        
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModelForSequenceClassification.from_pretrained(model_path)
-    return model, tokenizer
+    
+    # Import torch/transformers only once we know there is a model to load
+    from src.utils.model_utils import (
+        ONNX_MODEL_PATH, configure_torch_threads, get_model_and_tokenizer, get_onnx_model_and_tokenizer,
+        onnx_export_is_current
+    )
+    configure_torch_threads()
+    
+    # Prefer the optimized ONNX export when src/analysis/export_onnx.py has been run
+    # since the model was last trained
+    if onnx_export_is_current(ONNX_MODEL_PATH, model_path):
+        return get_onnx_model_and_tokenizer(ONNX_MODEL_PATH)
+    if os.path.exists(ONNX_MODEL_PATH):
+        print("ONNX export is older than the fine-tuned model; using the PyTorch model. "
+              "Re-run src/analysis/export_onnx.py to refresh it.")
+    return get_model_and_tokenizer(model_path)
 
-def predict_sentiment(text, model, tokenizer):
-    """Predict sentiment for a given text."""
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-    sentiment_idx = predictions.argmax().item()
-    confidence = predictions[0][sentiment_idx].item()
+def predict_sentiment(texts, model, tokenizer):
+    """Predict sentiment for a list of texts using length-sorted batches."""
+    from src.utils.model_utils import predict_logits
+    
+    logits = predict_logits(texts, model, tokenizer)
+    probs = logits.softmax(dim=-1)
+    sentiment_idx = probs.argmax(dim=-1)
+    confidence = probs.gather(1, sentiment_idx[:, None]).squeeze(1)
     
     # Map index to sentiment label from the model's config
     sentiment_map = model.config.id2label
-    return sentiment_map[sentiment_idx], confidence
+    return [
+        (sentiment_map[idx], conf)
+        for idx, conf in zip(sentiment_idx.tolist(), confidence.tolist())
+    ]
 
 def run_inference_examples():
     """Run inference on a few examples from different SEC filing sections."""
@@ -59,18 +68,22 @@ def run_inference_examples():
         ]
     }
     
-    # Test each category
-    print("="*50)
-    print("Running Inference Examples")
-    print("="*50)
+    # Run every example through the model in one batch, then split results per category
+    flat_texts = [text for texts in test_cases.values() for text in texts]
+    results = predict_sentiment(flat_texts, model, tokenizer)
+    
+    # Build the whole report and write it to stdout in one call
+    lines = ["="*50, "Running Inference Examples", "="*50]
+    start = 0
     for category, texts in test_cases.items():
-        print(f"\n--- {category} ---")
-        for text in texts:
-            sentiment, confidence = predict_sentiment(text, model, tokenizer)
-            print(f"\nText: {text}")
-            print(f"Predicted: {sentiment.upper()} (Confidence: {confidence:.2%})")
-    print("\n" + "="*50)
-
+        lines.append(f"\n--- {category} ---")
+        category_results = results[start:start + len(texts)]
+        start += len(texts)
+        for text, (sentiment, confidence) in zip(texts, category_results):
+            lines.append(f"\nText: {text}")
+            lines.append(f"Predicted: {sentiment.upper()} (Confidence: {confidence:.2%})")
+    lines.append("\n" + "="*50)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     run_inference_examples() 
\ No newline at end of file
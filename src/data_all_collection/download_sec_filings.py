@@ -1,17 +1,15 @@
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).resolve().parents[2]))
-
 import os
-import time
-from sec_edgar_api import EdgarClient
-from src.utils.file_utils import save_text, ensure_directory
+import asyncio
+import aiohttp
+from datetime import timedelta
+from src.utils.api_utils import AsyncRateLimiter
+from src.utils.file_utils import ensure_directory
+from src.utils.http_cache import read_cache, write_cache, conditional_headers, revalidate_cache
 
 # --- Configuration ---
 
 # Directory to save the downloaded filings
 SAVE_DIR = "data/raw/wealth_data/sec_filings"
-ensure_directory(SAVE_DIR)
 
 # SEC Edgar User-Agent
 # IMPORTANT: Replace with your actual name and email address
@@ -37,58 +35,169 @@ FORM_TYPES = ["10-K", "10-Q", "8-K"]
 # Number of recent filings to download for each form type
 FILINGS_PER_TYPE = 5
 
+# SEC fair-access policy allows at most 10 requests per second
+SEC_REQUESTS_PER_SECOND = 10
+MAX_CONCURRENT_REQUESTS = 10
+
+# Connection pool settings (seconds)
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 60
+
+# How long a cached submissions index stays valid
+SUBMISSIONS_TTL = timedelta(days=1)
+
+SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
+ARCHIVES_URL = "https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{document}"
+
+# Size of the chunks filings are streamed to disk in
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
 # --- Main Logic ---
 
+async def fetch_json(session, semaphore, limiter, url, ttl=SUBMISSIONS_TTL, revalidate=True):
+    """
+    Fetch a JSON document, respecting the concurrency cap and SEC rate limit, cached on disk for ttl.
+    Once the cached copy expires it is revalidated with a conditional GET, so an unchanged
+    document only costs a 304.
+    """
+    data = read_cache(url, ttl=ttl)
+    if data is not None:
+        return data
+    
+    headers = conditional_headers(url) if revalidate else {}
+    async with semaphore, limiter:
+        async with session.get(url, headers=headers) as response:
+            response.raise_for_status()
+            if response.status == 304:
+                data = revalidate_cache(url)
+            else:
+                data = await response.json()
+                write_cache(url, None, data, response.headers)
+    
+    if data is None:
+        # The cached copy disappeared after the conditional GET; fetch it in full
+        return await fetch_json(session, semaphore, limiter, url, ttl, revalidate=False)
+    return data
+
+async def fetch_to_file(session, semaphore, limiter, url, filepath):
+    """
+    Stream a URL's body straight to disk without buffering it in memory.
+    The body is written to a .part file and renamed once complete, so filepath only
+    ever exists with a full download.
+    """
+    part_path = f"{filepath}.part"
+    async with semaphore, limiter:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            with open(part_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+    os.replace(part_path, filepath)
+
+def select_recent_filings(submissions):
+    """Pick the FILINGS_PER_TYPE most recent filings of each form type."""
+    recent = submissions.get('filings', {}).get('recent', {})
+    filings = {form_type: [] for form_type in FORM_TYPES}
+    
+    for accession_number, filing_date, form_type, primary_document in zip(
+        recent.get('accessionNumber', []),
+        recent.get('filingDate', []),
+        recent.get('form', []),
+        recent.get('primaryDocument', [])
+    ):
+        if form_type in filings and len(filings[form_type]) < FILINGS_PER_TYPE:
+            filings[form_type].append({
+                'accessionNumber': accession_number,
+                'filingDate': filing_date,
+                'primaryDocument': primary_document
+            })
+    
+    return filings
+
+async def download_filing(session, semaphore, limiter, company_name, cik, form_type, filing):
+    """Download a single filing and save it to SAVE_DIR."""
+    accession_number = filing['accessionNumber']
+    filing_date = filing['filingDate']
+    
+    # The accession number keeps same-day filings of one form apart; they download
+    # concurrently and must never share a file
+    filename = f"{company_name.replace(' ', '_')}_{cik}_{form_type}_{filing_date}_{accession_number.replace('-', '')}.txt"
+    filepath = os.path.join(SAVE_DIR, filename)
+    
+    # Filings never change once published, so one saved by an earlier run can be reused
+    if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+        print(f"    Skipping {form_type} from {filing_date}, already downloaded to {filename}")
+        return
+    
+    try:
+        url = ARCHIVES_URL.format(
+            cik=int(cik),
+            accession=accession_number.replace('-', ''),
+            document=filing['primaryDocument']
+        )
+        
+        # Stream the full text of the filing to disk
+        await fetch_to_file(session, semaphore, limiter, url, filepath)
+        
+        print(f"    Successfully downloaded {form_type} from {filing_date} to {filename}")
+        
+    except Exception as e:
+        print(f"    Error downloading filing {accession_number}: {e}")
+
+async def download_company_filings(session, semaphore, limiter, company_name, cik):
+    """Fetch a company's submissions index and download its recent filings concurrently."""
+    print(f"\nProcessing {company_name} (CIK: {cik})...")
+    
+    try:
+        submissions = await fetch_json(session, semaphore, limiter, SUBMISSIONS_URL.format(cik=cik))
+    except Exception as e:
+        print(f"  Error fetching filings for {company_name}: {e}")
+        return
+    
+    tasks = []
+    for form_type, filings in select_recent_filings(submissions).items():
+        if not filings:
+            print(f"  No recent {form_type} filings found for {company_name}.")
+            continue
+        
+        for filing in filings:
+            tasks.append(download_filing(session, semaphore, limiter, company_name, cik, form_type, filing))
+    
+    await asyncio.gather(*tasks)
+
+async def download_all_filings():
+    """Download filings for every company over a single shared HTTP session."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    limiter = AsyncRateLimiter(SEC_REQUESTS_PER_SECOND)
+    
+    # One pooled session for every request: keep-alive connections are reused across
+    # companies and filings so each TLS handshake is paid once per connection
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_REQUESTS,
+        keepalive_timeout=KEEPALIVE_TIMEOUT
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    # Ask for compressed bodies explicitly; aiohttp inflates them as the chunks stream to disk
+    async with aiohttp.ClientSession(
+        headers={'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'},
+        connector=connector,
+        timeout=timeout
+    ) as session:
+        await asyncio.gather(*(
+            download_company_filings(session, semaphore, limiter, company_name, cik)
+            for company_name, cik in COMPANIES.items()
+        ))
+
 def download_sec_filings():
     """
-    Downloads recent SEC filings for a list of companies using the sec-edgar-api library.
+    Downloads recent SEC filings for a list of companies from the SEC EDGAR API.
+    Requests run concurrently, capped at SEC_REQUESTS_PER_SECOND.
     """
     print("Starting SEC filings download...")
     print(f"User-Agent: {USER_AGENT}")
     
-    # Initialize the EdgarClient
-    edgar_client = EdgarClient(user_agent=USER_AGENT)
-    
-    # Loop through each company
-    for company_name, cik in COMPANIES.items():
-        print(f"\nProcessing {company_name} (CIK: {cik})...")
-        
-        # Loop through each form type
-        for form_type in FORM_TYPES:
-            try:
-                print(f"  Fetching recent {form_type} filings...")
-                
-                # Get the N most recent filings of the specified type
-                filings = edgar_client.get_filings(cik=cik, form_type=form_type, limit=FILINGS_PER_TYPE)
-                
-                if not filings or 'filings' not in filings or not filings['filings']:
-                    print(f"  No recent {form_type} filings found.")
-                    continue
-                    
-                # Download each filing
-                for filing in filings['filings']:
-                    accession_number = filing['accessionNumber']
-                    filing_date = filing['filingDate']
-                    
-                    try:
-                        # Get the full text of the filing
-                        filing_text = edgar_client.get_filing_text(accession_number=accession_number)
-                        
-                        # Save the filing
-                        filename = f"{company_name.replace(' ', '_')}_{cik}_{form_type}_{filing_date}.txt"
-                        filepath = os.path.join(SAVE_DIR, filename)
-                        save_text(filing_text, filepath)
-                        
-                        print(f"    Successfully downloaded {form_type} from {filing_date} to {filename}")
-                        
-                    except Exception as e:
-                        print(f"    Error downloading filing {accession_number}: {e}")
-                    
-                    # Respect SEC rate limits by sleeping briefly
-                    time.sleep(0.1) 
-                    
-            except Exception as e:
-                print(f"  Error fetching {form_type} filings for {company_name}: {e}")
+    ensure_directory(SAVE_DIR)
+    asyncio.run(download_all_filings())
 
     print("\nSEC filings download complete.")
 
@@ -12,29 +12,28 @@ Date: 2025
 """
 
 import os
-import sys
 import time
 import logging
-from pathlib import Path
 from datetime import datetime
-
-# Add project root to path
-sys.path.append(str(Path(__file__).resolve().parents[2]))
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from src.utils.config_utils import load_config
-from src.utils.file_utils import ensure_directory
+from src.utils.file_utils import ensure_directory, count_files
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data_collection.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+def configure_logging():
+    """Configure logging for the orchestrator and each phase worker process."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('data_collection.log'),
+            logging.StreamHandler()
+        ]
+    )
+
 class DataCollectionOrchestrator:
     def __init__(self):
         self.config = load_config()
@@ -98,13 +97,20 @@ class DataCollectionOrchestrator:
         
         try:
             from src.data_collection.download_policy_uncertainty import main as download_policy_uncertainty
-            download_policy_uncertainty()
+            download_policy_uncertainty([])
             logger.info("Policy uncertainty data collection completed successfully")
             return True
         except Exception as e:
             logger.error(f"Policy uncertainty collection failed: {e}")
             return False
     
+    def run_fred_api_collections(self):
+        """
+        Phases 2 and 3: both call the FRED API with the same key, so they run one after
+        the other in a single worker to stay within FRED's per-key rate limit
+        """
+        return self.run_fred_collection(), self.run_policy_uncertainty_collection()
+    
     def generate_collection_summary(self):
         """Generate a summary of collected data"""
         logger.info("=== DATA COLLECTION SUMMARY ===")
@@ -115,20 +121,14 @@ class DataCollectionOrchestrator:
             'policy_uncertainty': 0
         }
         
-        # Count SEC filings
-        sec_dir = Path(self.directories['sec_filings'])
-        if sec_dir.exists():
-            summary['sec_filings'] = len(list(sec_dir.glob('*.txt')))
-        
-        # Count FRED data files
-        fred_dir = Path(self.directories['fred_data'])
-        if fred_dir.exists():
-            summary['fred_data'] = len(list(fred_dir.glob('*.json'))) + len(list(fred_dir.glob('*.txt')))
-        
-        # Count policy uncertainty files
-        policy_dir = Path(self.directories['policy_uncertainty'])
-        if policy_dir.exists():
-            summary['policy_uncertainty'] = len(list(policy_dir.glob('*.json'))) + len(list(policy_dir.glob('*.csv')))
+        # Count files with a single directory scan per source
+        summary['sec_filings'] = count_files(self.directories['sec_filings'], ('.txt',))
+        summary['fred_data'] = count_files(self.directories['fred_data'], ('.json', '.txt'))
+        summary['policy_uncertainty'] = count_files(self.directories['policy_uncertainty'], ('.json', '.csv'))
+        # Each EPU series is stored as its own parquet partition
+        summary['policy_uncertainty'] += sum(1 for _ in Path(self.directories['policy_uncertainty']).glob(
+            'policy_uncertainty_data/series_id=*/part.parquet'
+        ))
         
         logger.info(f"SEC Filings: {summary['sec_filings']} files")
         logger.info(f"FRED Data: {summary['fred_data']} files")
@@ -151,14 +151,26 @@ class DataCollectionOrchestrator:
             'policy_uncertainty': False
         }
         
-        # Phase 1: SEC Filings (Always run - no API key required)
-        results['sec_filings'] = self.run_sec_collection()
-        
-        # Phase 2: FRED Economic Data (Requires API key)
-        results['fred_data'] = self.run_fred_collection()
-        
-        # Phase 3: Policy Uncertainty (Requires FRED API key)
-        results['policy_uncertainty'] = self.run_policy_uncertainty_collection()
+        # SEC EDGAR and FRED are independent APIs, so their phases run concurrently in
+        # separate processes. Phases 2 and 3 share the FRED API key and its rate limit,
+        # so they run sequentially in the same worker.
+        with ProcessPoolExecutor(max_workers=2, initializer=configure_logging) as executor:
+            futures = {
+                # Phase 1: SEC Filings (Always run - no API key required)
+                executor.submit(self.run_sec_collection): ('sec_filings',),
+                # Phases 2 and 3: FRED Economic Data and Policy Uncertainty (Require FRED API key)
+                executor.submit(self.run_fred_api_collections): ('fred_data', 'policy_uncertainty')
+            }
+            
+            for future in as_completed(futures):
+                phases = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    names = " and ".join(phase.replace('_', ' ').title() for phase in phases)
+                    logger.error(f"{names} worker failed: {e}")
+                    continue
+                results.update(zip(phases, outcome if isinstance(outcome, tuple) else (outcome,)))
         
         # Generate summary
         summary = self.generate_collection_summary()
@@ -179,6 +191,7 @@ class DataCollectionOrchestrator:
 
 def main():
     """Main entry point"""
+    configure_logging()
     orchestrator = DataCollectionOrchestrator()
     results, summary = orchestrator.run_complete_collection()
     
@@ -2,19 +2,19 @@
 Download and process Federal Reserve Economic Data (FRED) for model enrichment.
 Transforms numerical economic data into meaningful text descriptions.
 """
-import os
-import json
+import asyncio
+import orjson
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-import sys
-from typing import Dict, List, Any, Optional
-
-# Add project root to path
-sys.path.append(str(Path(__file__).resolve().parents[2]))
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Tuple
 
+from src.utils.api_utils import RateLimiter, create_session
 from src.utils.config_utils import load_config
+from src.utils.http_cache import cached_get
 from src.utils.file_utils import save_text, ensure_directory
 
 # Load configuration
@@ -24,95 +24,122 @@ FRED_API_KEY = config["api_keys"]["fred"]
 # FRED API base URL
 FRED_BASE_URL = "https://api.stlouisfed.org/fred"
 
+# Shared session so every request reuses pooled keep-alive connections
+FRED_SESSION = create_session()
+REQUEST_TIMEOUT = 10
+
+# Maximum number of FRED requests in flight at once
+MAX_CONCURRENT_REQUESTS = 5
+
+# FRED allows 120 requests per minute per API key
+FRED_RATE_LIMITER = RateLimiter(120 / 60)
+
+# How long cached responses stay valid: metadata rarely changes, observations update daily
+SERIES_INFO_TTL = timedelta(days=30)
+OBSERVATIONS_TTL = timedelta(days=1)
+
+# Query parameters shared by every request; only series_id (and limit) vary per call
+OBSERVATIONS_PARAMS = MappingProxyType({
+    "api_key": FRED_API_KEY,
+    "file_type": "json",
+    "sort_order": "desc"
+})
+SERIES_INFO_PARAMS = MappingProxyType({
+    "api_key": FRED_API_KEY,
+    "file_type": "json"
+})
+
+# (trend, sentiment, outlook) wording for a falling, flat and rising indicator,
+# indexed by the sign of the change + 1
+TREND_DESCRIPTIONS = (
+    ("decreased", "negative", "declining"),
+    ("remained stable", "neutral", "stable"),
+    ("increased", "positive", "improving")
+)
+
 # Key economic indicators to track
-ECONOMIC_INDICATORS = {
-    "GDP": {
+ECONOMIC_INDICATORS = MappingProxyType({
+    "GDP": MappingProxyType({
         "series_id": "GDP",
         "name": "Gross Domestic Product",
         "frequency": "quarterly",
         "description": "The total value of goods and services produced in the US"
-    },
-    "CPI": {
+    }),
+    "CPI": MappingProxyType({
         "series_id": "CPIAUCSL",
         "name": "Consumer Price Index",
         "frequency": "monthly", 
         "description": "Measures inflation by tracking changes in consumer prices"
-    },
-    "UNEMPLOYMENT": {
+    }),
+    "UNEMPLOYMENT": MappingProxyType({
         "series_id": "UNRATE",
         "name": "Unemployment Rate",
         "frequency": "monthly",
         "description": "Percentage of the labor force that is unemployed"
-    },
-    "FEDERAL_FUNDS_RATE": {
+    }),
+    "FEDERAL_FUNDS_RATE": MappingProxyType({
         "series_id": "FEDFUNDS",
         "name": "Federal Funds Rate",
         "frequency": "monthly",
         "description": "The interest rate at which banks lend to each other overnight"
-    },
-    "CONSUMER_SENTIMENT": {
+    }),
+    "CONSUMER_SENTIMENT": MappingProxyType({
         "series_id": "UMCSENT",
         "name": "University of Michigan Consumer Sentiment",
         "frequency": "monthly",
         "description": "Measures consumer confidence and economic outlook"
-    },
-    "MANUFACTURING_PMI": {
+    }),
+    "MANUFACTURING_PMI": MappingProxyType({
         "series_id": "NAPM",
         "name": "ISM Manufacturing PMI",
         "frequency": "monthly",
         "description": "Purchasing Managers Index indicating manufacturing sector health"
-    }
-}
+    })
+})
 
-def get_fred_data(series_id: str, limit: int = 24) -> Optional[Dict[str, Any]]:
+def get_fred_data(series_id: str, limit: int = 24, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
     """
     Fetch data for a specific FRED series.
     
     Args:
         series_id: The FRED series ID
         limit: Number of most recent observations to fetch
+        force_refresh: Ignore any cached response and re-download
         
     Returns:
         Dictionary containing series metadata and observations
     """
     url = f"{FRED_BASE_URL}/series/observations"
-    params = {
-        "series_id": series_id,
-        "api_key": FRED_API_KEY,
-        "file_type": "json",
-        "limit": limit,
-        "sort_order": "desc"
-    }
+    params = OBSERVATIONS_PARAMS | {"series_id": series_id, "limit": limit}
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return cached_get(
+            FRED_SESSION, url, params, ttl=OBSERVATIONS_TTL,
+            force_refresh=force_refresh, rate_limiter=FRED_RATE_LIMITER, timeout=REQUEST_TIMEOUT
+        )
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data for {series_id}: {e}")
         return None
 
-def get_series_info(series_id: str) -> Optional[Dict[str, Any]]:
+def get_series_info(series_id: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
     """
     Fetch metadata for a FRED series.
     
     Args:
         series_id: The FRED series ID
+        force_refresh: Ignore any cached response and re-download
         
     Returns:
         Dictionary containing series metadata
     """
     url = f"{FRED_BASE_URL}/series"
-    params = {
-        "series_id": series_id,
-        "api_key": FRED_API_KEY,
-        "file_type": "json"
-    }
+    params = SERIES_INFO_PARAMS | {"series_id": series_id}
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = cached_get(
+            FRED_SESSION, url, params, ttl=SERIES_INFO_TTL,
+            force_refresh=force_refresh, rate_limiter=FRED_RATE_LIMITER, timeout=REQUEST_TIMEOUT
+        )
         return data.get("seriess", [{}])[0] if data.get("seriess") else None
     except requests.exceptions.RequestException as e:
         print(f"Error fetching series info for {series_id}: {e}")
@@ -142,16 +169,9 @@ def transform_to_text(series_data: Dict[str, Any], series_info: Dict[str, Any],
     # Get the most recent observations for analysis
     recent_obs = observations[:12]  # Last 12 observations
     
-    # Calculate basic statistics
-    values = []
-    dates = []
-    for obs in recent_obs:
-        try:
-            value = float(obs["value"])
-            values.append(value)
-            dates.append(obs["date"])
-        except (ValueError, KeyError):
-            continue
+    # Parse values in one vectorised pass; missing values (FRED uses ".") become NaN and are dropped
+    values = pd.to_numeric(pd.Series([obs.get("value") for obs in recent_obs]), errors="coerce").to_numpy()
+    values = values[~np.isnan(values)]
     
     if len(values) < 2:
         return texts
@@ -163,15 +183,7 @@ def transform_to_text(series_data: Dict[str, Any], series_info: Dict[str, Any],
     change_percent = (change / previous_value * 100) if previous_value != 0 else 0
     
     # Determine trend direction
-    if change > 0:
-        trend = "increased"
-        sentiment = "positive"
-    elif change < 0:
-        trend = "decreased"
-        sentiment = "negative"
-    else:
-        trend = "remained stable"
-        sentiment = "neutral"
+    trend, sentiment, outlook = TREND_DESCRIPTIONS[int(change > 0) - int(change < 0) + 1]
     
     # Create contextual text descriptions
     indicator_name = indicator_config["name"]
@@ -184,11 +196,11 @@ def transform_to_text(series_data: Dict[str, Any], series_info: Dict[str, Any],
     # Trend analysis text
     trend_text = f"Economic indicator analysis: {indicator_name} has {trend} by {abs(change):.2f} "
     trend_text += f"({abs(change_percent):.1f}%) from the previous measurement period. "
-    trend_text += f"This {sentiment} movement suggests {'improving' if sentiment == 'positive' else 'declining' if sentiment == 'negative' else 'stable'} economic conditions."
+    trend_text += f"This {sentiment} movement suggests {outlook} economic conditions."
     
     # Historical context text
     if len(values) >= 4:
-        avg_value = sum(values[:4]) / 4  # Average of last 4 periods
+        avg_value = values[:4].mean()  # Average of last 4 periods
         if current_value > avg_value * 1.05:
             context = "above recent historical levels"
         elif current_value < avg_value * 0.95:
@@ -205,6 +217,34 @@ def transform_to_text(series_data: Dict[str, Any], series_info: Dict[str, Any],
     
     return texts
 
+async def fetch_indicator(semaphore: asyncio.Semaphore, indicator_key: str, config: Dict[str, str]) -> Tuple[str, Dict[str, str], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Fetch metadata and observations for one indicator concurrently.
+    
+    The blocking session calls run in worker threads; the semaphore bounds how many
+    requests are in flight across all indicators.
+    
+    Returns:
+        Tuple of (indicator_key, indicator_config, series_info, series_data)
+    """
+    async def bounded(func, *args):
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+    
+    series_info, series_data = await asyncio.gather(
+        bounded(get_series_info, config['series_id']),
+        bounded(get_fred_data, config['series_id'])
+    )
+    return indicator_key, config, series_info, series_data
+
+async def fetch_all_indicators() -> List[Tuple[str, Dict[str, str], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Fetch every indicator in ECONOMIC_INDICATORS, preserving their order."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return await asyncio.gather(*(
+        fetch_indicator(semaphore, indicator_key, config)
+        for indicator_key, config in ECONOMIC_INDICATORS.items()
+    ))
+
 def download_fred_data():
     """
     Download and process FRED economic data for model enrichment.
@@ -212,22 +252,23 @@ def download_fred_data():
     print("--- Starting FRED Economic Data Download ---")
     
     # Ensure output directory exists
-    output_dir = "data/raw/wealth_data/fred_data"
+    output_dir = Path("data/raw/wealth_data/fred_data")
     ensure_directory(output_dir)
     
     all_texts = []
     
-    for indicator_key, config in ECONOMIC_INDICATORS.items():
+    # Fetch metadata and observations for every indicator concurrently
+    results = asyncio.run(fetch_all_indicators())
+    
+    for indicator_key, config, series_info, series_data in results:
         print(f"\nProcessing {config['name']} ({config['series_id']})...")
         
-        # Get series metadata
-        series_info = get_series_info(config['series_id'])
+        # Check series metadata
         if not series_info:
             print(f"  Could not fetch metadata for {config['series_id']}")
             continue
         
-        # Get series data
-        series_data = get_fred_data(config['series_id'])
+        # Check series data
         if not series_data:
             print(f"  Could not fetch data for {config['series_id']}")
             continue
@@ -237,30 +278,24 @@ def download_fred_data():
         
         if texts:
             # Save individual indicator data
-            indicator_file = os.path.join(output_dir, f"{indicator_key.lower()}_data.json")
-            with open(indicator_file, 'w') as f:
-                json.dump({
-                    "indicator": config,
+            indicator_file = output_dir / f"{indicator_key.lower()}_data.json"
+            with open(indicator_file, 'wb') as f:
+                f.write(orjson.dumps({
+                    "indicator": dict(config),
                     "series_info": series_info,
                     "series_data": series_data,
                     "text_descriptions": texts
-                }, f, indent=2)
+                }, option=orjson.OPT_INDENT_2))
             
             all_texts.extend(texts)
             print(f"  Generated {len(texts)} text descriptions")
         else:
             print(f"  No text descriptions generated for {config['series_id']}")
-        
-        # Respect rate limits
-        import time
-        time.sleep(0.1)
     
     # Save all texts in a format compatible with our training pipeline
     if all_texts:
-        combined_file = os.path.join(output_dir, "combined_economic_context.txt")
-        with open(combined_file, 'w') as f:
-            for text in all_texts:
-                f.write(text + "\n\n")
+        combined_file = output_dir / "combined_economic_context.txt"
+        combined_file.write_text("\n\n".join(all_texts) + "\n\n", encoding="utf-8")
         
         print(f"\n--- FRED Data Download Complete ---")
         print(f"Total text descriptions generated: {len(all_texts)}")
@@ -14,20 +14,63 @@ Date: 2025
 """
 
 import requests
-import json
+import orjson
 import pandas as pd
 import os
-import time
-from datetime import datetime
+import argparse
+from datetime import datetime, timedelta
 from pathlib import Path
+from types import MappingProxyType
 import logging
 
+from src.utils.api_utils import RateLimiter, create_session
+from src.utils.config_utils import load_config
+from src.utils.http_cache import cached_get
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# (trend, direction) wording for a falling, flat and rising index, indexed by the sign of the change + 1
+TREND_DESCRIPTIONS = (
+    ("decreased", "lower"),
+    ("remained unchanged", "stable"),
+    ("increased", "higher")
+)
+
 class PolicyUncertaintyDownloader:
-    def __init__(self):
+    # Define the EPU series to download
+    epu_series = MappingProxyType({
+        'USEPUINDXD': MappingProxyType({
+            'name': 'US_Economic_Policy_Uncertainty_Daily',
+            'description': 'Daily US Economic Policy Uncertainty Index based on newspaper coverage'
+        }),
+        'USEPUINDXM': MappingProxyType({
+            'name': 'US_Economic_Policy_Uncertainty_Monthly', 
+            'description': 'Monthly US Economic Policy Uncertainty Index'
+        }),
+        'GEPUCURRENT': MappingProxyType({
+            'name': 'Global_Economic_Policy_Uncertainty',
+            'description': 'Global Economic Policy Uncertainty Index (GDP-weighted average of 20 countries)'
+        }),
+        'EPUMONETARY': MappingProxyType({
+            'name': 'Monetary_Policy_Uncertainty',
+            'description': 'Economic Policy Uncertainty Index: Monetary Policy Category'
+        }),
+        'GEPUWEIGHTS': MappingProxyType({
+            'name': 'Global_EPU_Weights',
+            'description': 'Global Economic Policy Uncertainty Index: Weights'
+        })
+    })
+    
+    # Category sets shared by every series, so the metadata columns stay categorical when combined
+    series_id_dtype = pd.CategoricalDtype(tuple(epu_series))
+    series_name_dtype = pd.CategoricalDtype(tuple(config['name'] for config in epu_series.values()))
+    
+    def __init__(self, write_csv=False):
+        # Also export the combined data as CSV for consumers that predate Parquet
+        self.write_csv = write_csv
+        
         # Load configuration
         self.config = self.load_config()
         self.api_key = self.config.get('api_keys', {}).get('fred')
@@ -35,57 +78,41 @@ class PolicyUncertaintyDownloader:
         if not self.api_key:
             raise ValueError("FRED API key not found in config.json under api_keys.fred")
         
+        # Shared session so every request reuses pooled keep-alive connections
+        self.session = create_session()
+        
+        # FRED allows 120 requests per minute per API key; cache hits don't count
+        self.rate_limiter = RateLimiter(120 / 60)
+        
         # Create output directory
         self.output_dir = Path("data/raw/wealth_data/policy_uncertainty")
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Define the EPU series to download
-        self.epu_series = {
-            'USEPUINDXD': {
-                'name': 'US_Economic_Policy_Uncertainty_Daily',
-                'description': 'Daily US Economic Policy Uncertainty Index based on newspaper coverage'
-            },
-            'USEPUINDXM': {
-                'name': 'US_Economic_Policy_Uncertainty_Monthly', 
-                'description': 'Monthly US Economic Policy Uncertainty Index'
-            },
-            'GEPUCURRENT': {
-                'name': 'Global_Economic_Policy_Uncertainty',
-                'description': 'Global Economic Policy Uncertainty Index (GDP-weighted average of 20 countries)'
-            },
-            'EPUMONETARY': {
-                'name': 'Monetary_Policy_Uncertainty',
-                'description': 'Economic Policy Uncertainty Index: Monetary Policy Category'
-            },
-            'GEPUWEIGHTS': {
-                'name': 'Global_EPU_Weights',
-                'description': 'Global Economic Policy Uncertainty Index: Weights'
-            }
-        }
+        # Query parameters shared by every request; only series_id varies per call
+        self.observations_params = MappingProxyType({
+            'api_key': self.api_key,
+            'file_type': 'json',
+            'sort_order': 'desc'
+        })
+        self.series_info_params = MappingProxyType({
+            'api_key': self.api_key,
+            'file_type': 'json'
+        })
 
     def load_config(self):
-        """Load configuration from config.json"""
-        config_path = Path("config/config.json")
-        if config_path.exists():
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        else:
-            raise FileNotFoundError("config.json not found")
+        """Load configuration from config.json (parsed once per process)"""
+        return load_config()
 
-    def fetch_series_data(self, series_id):
-        """Fetch data for a specific FRED series"""
+    def fetch_series_data(self, series_id, force_refresh=False):
+        """Fetch data for a specific FRED series (cached on disk for a day)"""
         url = f"https://api.stlouisfed.org/fred/series/observations"
-        params = {
-            'series_id': series_id,
-            'api_key': self.api_key,
-            'file_type': 'json',
-            'sort_order': 'desc'
-        }
+        params = self.observations_params | {'series_id': series_id}
         
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = cached_get(
+                self.session, url, params, ttl=timedelta(days=1),
+                force_refresh=force_refresh, rate_limiter=self.rate_limiter, timeout=10
+            )
             
             if 'observations' in data:
                 return data['observations']
@@ -97,19 +124,16 @@ class PolicyUncertaintyDownloader:
             logger.error(f"Error fetching data for series {series_id}: {str(e)}")
             return []
 
-    def fetch_series_info(self, series_id):
-        """Fetch metadata for a specific FRED series"""
+    def fetch_series_info(self, series_id, force_refresh=False):
+        """Fetch metadata for a specific FRED series (cached on disk for 30 days)"""
         url = f"https://api.stlouisfed.org/fred/series"
-        params = {
-            'series_id': series_id,
-            'api_key': self.api_key,
-            'file_type': 'json'
-        }
+        params = self.series_info_params | {'series_id': series_id}
         
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = cached_get(
+                self.session, url, params, ttl=timedelta(days=30),
+                force_refresh=force_refresh, rate_limiter=self.rate_limiter, timeout=10
+            )
             
             if 'seriess' in data and data['seriess']:
                 return data['seriess'][0]
@@ -127,11 +151,13 @@ class PolicyUncertaintyDownloader:
             logger.warning(f"No data to process for {series_id}")
             return None
         
-        # Convert to DataFrame
-        df = pd.DataFrame(observations)
+        # Convert to DataFrame, selecting the known FRED observation fields directly
+        df = pd.DataFrame.from_records(
+            observations, columns=['realtime_start', 'realtime_end', 'date', 'value']
+        )
         
-        # Convert date and value columns
-        df['date'] = pd.to_datetime(df['date'])
+        # Convert date and value columns (FRED dates are always ISO formatted)
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', cache=True)
         df['value'] = pd.to_numeric(df['value'], errors='coerce')
         
         # Remove rows with missing values
@@ -140,9 +166,9 @@ class PolicyUncertaintyDownloader:
         # Sort by date
         df = df.sort_values('date')
         
-        # Add metadata
-        df['series_id'] = series_id
-        df['series_name'] = series_name
+        # Add metadata as categoricals sharing one category set across all series
+        df['series_id'] = pd.Categorical([series_id] * len(df), dtype=self.series_id_dtype)
+        df['series_name'] = pd.Categorical([series_name] * len(df), dtype=self.series_name_dtype)
         
         return df
 
@@ -153,28 +179,22 @@ class PolicyUncertaintyDownloader:
         
         context_descriptions = []
         
+        # Only value and date are needed, so index the underlying arrays directly
+        values = df['value'].to_numpy()
+        dates = df['date'].to_numpy()
+        
         # Get the most recent value
-        latest = df.iloc[-1]
-        latest_value = latest['value']
-        latest_date = latest['date'].strftime('%Y-%m-%d')
+        latest_value = values[-1]
+        latest_date = pd.Timestamp(dates[-1]).strftime('%Y-%m-%d')
         
         # Get the previous value for comparison
-        if len(df) > 1:
-            previous = df.iloc[-2]
-            previous_value = previous['value']
+        if len(values) > 1:
+            previous_value = values[-2]
             change = latest_value - previous_value
             change_percent = (change / previous_value) * 100 if previous_value != 0 else 0
             
             # Determine trend
-            if change > 0:
-                trend = "increased"
-                direction = "higher"
-            elif change < 0:
-                trend = "decreased"
-                direction = "lower"
-            else:
-                trend = "remained unchanged"
-                direction = "stable"
+            trend, direction = TREND_DESCRIPTIONS[int(change > 0) - int(change < 0) + 1]
             
             # Generate description
             description = (
@@ -192,9 +212,8 @@ class PolicyUncertaintyDownloader:
         context_descriptions.append(description)
         
         # Add historical context if available
-        if len(df) >= 12:  # At least a year of data
-            year_ago = df.iloc[-12]
-            year_ago_value = year_ago['value']
+        if len(values) >= 12:  # At least a year of data
+            year_ago_value = values[-12]
             year_change = latest_value - year_ago_value
             year_change_percent = (year_change / year_ago_value) * 100 if year_ago_value != 0 else 0
             
@@ -212,9 +231,16 @@ class PolicyUncertaintyDownloader:
         """Download all EPU series"""
         logger.info("--- Starting Policy Uncertainty Data Download ---")
         
-        all_data = []
         all_context = []
         
+        # Each series is written to its own partition as soon as it is processed,
+        # so the summary is accumulated here instead of from a combined frame
+        dataset_path = self.output_dir / "policy_uncertainty_data"
+        csv_path = self.output_dir / "policy_uncertainty_data.csv"
+        series_written = 0
+        total_observations = 0
+        start_date = end_date = None
+        
         for series_id, series_config in self.epu_series.items():
             logger.info(f"Processing {series_config['name']} ({series_id})...")
             
@@ -233,48 +259,55 @@ class PolicyUncertaintyDownloader:
             # Process data
             df = self.process_series_data(series_id, series_config['name'], observations)
             if df is not None and not df.empty:
-                all_data.append(df)
+                # series_id is encoded in the Hive partition directory name
+                partition_path = dataset_path / f"series_id={series_id}"
+                partition_path.mkdir(parents=True, exist_ok=True)
+                df.drop(columns='series_id').to_parquet(
+                    partition_path / "part.parquet", engine="pyarrow", compression="zstd", index=False
+                )
+                
+                if self.write_csv:
+                    df.to_csv(csv_path, mode='a' if series_written else 'w', header=not series_written, index=False)
+                
+                series_written += 1
+                total_observations += len(df)
+                series_start, series_end = df['date'].iloc[0], df['date'].iloc[-1]
+                start_date = series_start if start_date is None else min(start_date, series_start)
+                end_date = series_end if end_date is None else max(end_date, series_end)
                 
                 # Generate context
                 context = self.generate_policy_context(df, series_info)
                 all_context.extend(context)
                 
                 logger.info(f"  Generated {len(context)} context descriptions")
-            
-            # Rate limiting
-            time.sleep(1)
         
-        # Combine all data
-        if all_data:
-            combined_df = pd.concat(all_data, ignore_index=True)
-            
-            # Save raw data
-            csv_path = self.output_dir / "policy_uncertainty_data.csv"
-            combined_df.to_csv(csv_path, index=False)
-            logger.info(f"Raw data saved to: {csv_path}")
+        if series_written:
+            logger.info(f"Raw data saved to: {dataset_path}")
+            if self.write_csv:
+                logger.info(f"Raw data also saved to: {csv_path}")
             
             # Save context descriptions
             context_path = self.output_dir / "policy_uncertainty_context.json"
-            with open(context_path, 'w') as f:
-                json.dump(all_context, f, indent=2)
+            with open(context_path, 'wb') as f:
+                f.write(orjson.dumps(all_context, option=orjson.OPT_INDENT_2))
             logger.info(f"Context descriptions saved to: {context_path}")
             
             # Create summary
             summary = {
                 'download_date': datetime.now().isoformat(),
-                'total_series': len(all_data),
-                'total_observations': len(combined_df),
+                'total_series': series_written,
+                'total_observations': total_observations,
                 'date_range': {
-                    'start': combined_df['date'].min().strftime('%Y-%m-%d'),
-                    'end': combined_df['date'].max().strftime('%Y-%m-%d')
+                    'start': start_date.strftime('%Y-%m-%d'),
+                    'end': end_date.strftime('%Y-%m-%d')
                 },
                 'series_included': list(self.epu_series.keys()),
                 'context_descriptions_count': len(all_context)
             }
             
             summary_path = self.output_dir / "download_summary.json"
-            with open(summary_path, 'w') as f:
-                json.dump(summary, f, indent=2)
+            with open(summary_path, 'wb') as f:
+                f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
             logger.info(f"Download summary saved to: {summary_path}")
             
             logger.info(f"--- Policy Uncertainty Data Download Complete ---")
@@ -286,10 +319,14 @@ class PolicyUncertaintyDownloader:
             logger.error("No data was successfully downloaded")
             return False
 
-def main():
+def main(argv=None):
     """Main function"""
+    parser = argparse.ArgumentParser(description="Download Economic Policy Uncertainty indices from FRED")
+    parser.add_argument("--csv", action="store_true", help="Also write the combined data as CSV")
+    args = parser.parse_args(argv)
+    
     try:
-        downloader = PolicyUncertaintyDownloader()
+        downloader = PolicyUncertaintyDownloader(write_csv=args.csv)
         success = downloader.download_all_series()
         
         if success:
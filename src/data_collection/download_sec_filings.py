@@ -1,20 +1,20 @@
 """
 Download SEC filings with proper rate limiting and error handling.
 """
-import sys
-from pathlib import Path
-sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 import os
-import time
-import requests
-from src.utils.file_utils import save_text, ensure_directory
+import asyncio
+import aiohttp
+import numpy as np
+from datetime import timedelta
+from src.utils.api_utils import AsyncRateLimiter
+from src.utils.file_utils import ensure_directory
+from src.utils.http_cache import read_cache, write_cache, conditional_headers, revalidate_cache
 
 # --- Configuration ---
 
 # Directory to save the downloaded filings
 SAVE_DIR = "data/raw/wealth_data/sec_filings"
-ensure_directory(SAVE_DIR)
 
 # SEC Edgar User-Agent
 # IMPORTANT: Replace with your actual name and email address
@@ -40,17 +40,156 @@ FORM_TYPES = ["10-K", "10-Q", "8-K"]
 # Number of recent filings to download for each form type
 FILINGS_PER_TYPE = 10
 
+# SEC fair-access policy allows at most 10 requests per second
+SEC_REQUESTS_PER_SECOND = 10
+MAX_CONCURRENT_REQUESTS = 10
+
+# How long a cached submissions index stays valid
+SUBMISSIONS_TTL = timedelta(days=1)
+
+# Size of the chunks filings are streamed to disk in
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 # --- Main Logic ---
 
-def get_filing_content(cik, accession_number_with_dashes, primary_document):
+async def fetch_filing_to(session, semaphore, limiter, cik, accession_number_with_dashes, primary_document, dest_path):
     """
-    Fetches the content of a specific filing.
+    Streams the content of a specific filing straight to dest_path.
+    The body is written to a .part file and renamed once complete, so dest_path only
+    ever exists with a full download.
     """
     url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number_with_dashes.replace('-', '')}/{primary_document}"
-    headers = {'User-Agent': USER_AGENT}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.text
+    part_path = f"{dest_path}.part"
+    async with semaphore, limiter:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            with open(part_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+    os.replace(part_path, dest_path)
+
+
+async def get_submissions(session, semaphore, limiter, cik, force_refresh=False):
+    """
+    Fetches the submissions index listing a company's recent filings.
+    Responses are cached on disk for SUBMISSIONS_TTL; after that the cached copy is
+    revalidated with a conditional GET, so an unchanged index only costs a 304.
+    """
+    submissions_url = f"https://data.sec.gov/submissions/CIK{cik.zfill(10)}.json"
+    if not force_refresh:
+        submissions = read_cache(submissions_url, ttl=SUBMISSIONS_TTL)
+        if submissions is not None:
+            return submissions
+    
+    headers = {} if force_refresh else conditional_headers(submissions_url)
+    async with semaphore, limiter:
+        async with session.get(submissions_url, headers=headers) as response:
+            response.raise_for_status()
+            if response.status == 304:
+                submissions = revalidate_cache(submissions_url)
+            else:
+                submissions = await response.json()
+                write_cache(submissions_url, None, submissions, response.headers)
+    
+    if submissions is None:
+        # The cached copy disappeared after the conditional GET; fetch it in full
+        return await get_submissions(session, semaphore, limiter, cik, force_refresh=True)
+    return submissions
+
+
+def select_filings(submissions):
+    """
+    Picks the FILINGS_PER_TYPE most recent filings of each form type in FORM_TYPES.
+    Returns a list of (form_type, accession_number_raw, filing_date, primary_document).
+    """
+    if not submissions or 'filings' not in submissions or 'recent' not in submissions['filings']:
+        return []
+    
+    recent_filings = submissions['filings']['recent']
+    accession_numbers = np.asarray(recent_filings.get('accessionNumber', []))
+    filing_dates = np.asarray(recent_filings.get('filingDate', []))
+    form_types = np.asarray(recent_filings.get('form', []))
+    primary_documents = np.asarray(recent_filings.get('primaryDocument', []))
+
+    # The columns are newest-first, so the first matches of each form are the most recent;
+    # re-sort the picks to keep the original filing order
+    selected = np.sort(np.concatenate([
+        np.flatnonzero(form_types == form_type)[:FILINGS_PER_TYPE] for form_type in FORM_TYPES
+    ]))
+
+    return [
+        (str(form_types[i]), str(accession_numbers[i]), str(filing_dates[i]), str(primary_documents[i]))
+        for i in selected
+    ]
+
+
+async def download_filing(session, semaphore, limiter, output_dir, cik, filing):
+    """
+    Downloads one filing and saves it to output_dir.
+    Errors are reported and swallowed so one failure doesn't cancel the other downloads.
+    """
+    form_type, accession_number_raw, filing_date, primary_document = filing
+    accession_number = accession_number_raw.replace("-", "")
+    
+    # Define the output path
+    filename = f"{accession_number}_{form_type.replace('/', '_')}_{filing_date}.txt"
+    output_path = os.path.join(output_dir, filename)
+    
+    # Filings never change once published, so one saved by an earlier run can be reused
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        print(f"    Already downloaded {form_type}: {filename}")
+        return
+    
+    try:
+        # Stream the full filing content to disk
+        await fetch_filing_to(session, semaphore, limiter, cik, accession_number_raw, primary_document, output_path)
+        
+        print(f"    Downloaded {form_type}: {filename}")
+        
+    except aiohttp.ClientResponseError as e:
+        print(f"    HTTP Error downloading filing {accession_number_raw}: {e}")
+    except Exception as e:
+        print(f"    Error processing filing {accession_number_raw}: {e}")
+
+
+async def download_all_filings(output_dir):
+    """
+    Fetches every company's submissions, then downloads all selected filings concurrently
+    within the SEC rate limit.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    limiter = AsyncRateLimiter(SEC_REQUESTS_PER_SECOND)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    
+    # Ask for compressed bodies explicitly; aiohttp inflates them as the chunks stream to disk
+    headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'}
+    
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        print("  Fetching recent filings...")
+        
+        # Collect per-company submissions first
+        results = await asyncio.gather(
+            *(get_submissions(session, semaphore, limiter, cik) for cik in COMPANIES.values()),
+            return_exceptions=True
+        )
+        
+        async with asyncio.TaskGroup() as tg:
+            for (company_name, cik), submissions in zip(COMPANIES.items(), results):
+                if isinstance(submissions, aiohttp.ClientResponseError):
+                    print(f"  HTTP Error fetching submissions for {company_name}: {submissions}")
+                    continue
+                if isinstance(submissions, Exception):
+                    print(f"  Error processing {company_name}: {submissions}")
+                    continue
+                
+                filings = select_filings(submissions)
+                if not filings:
+                    print(f"  No recent filings found for {company_name}.")
+                    continue
+                
+                print(f"\nQueued {len(filings)} filings for {company_name} (CIK: {cik})")
+                for filing in filings:
+                    tg.create_task(download_filing(session, semaphore, limiter, output_dir, cik, filing))
 
 
 def download_sec_filings():
@@ -59,72 +198,11 @@ def download_sec_filings():
     It fetches all recent filings and saves them locally.
     """
     # Ensure the output directory exists
-    output_dir = "data/raw/wealth_data/sec_filings"
-    os.makedirs(output_dir, exist_ok=True)
+    ensure_directory(SAVE_DIR)
 
     print("--- Starting SEC Filing Download ---")
 
-    for company_name, cik in COMPANIES.items():
-        print(f"\nProcessing {company_name} (CIK: {cik})...")
-        
-        try:
-            print(f"  Fetching recent filings...")
-            
-            # Construct the URL for the submissions API
-            submissions_url = f"https://data.sec.gov/submissions/CIK{cik.zfill(10)}.json"
-            headers = {'User-Agent': USER_AGENT}
-            
-            # Get the most recent filings of any type
-            response = requests.get(submissions_url, headers=headers)
-            response.raise_for_status()
-            submissions = response.json()
-            
-            if submissions and 'filings' in submissions and 'recent' in submissions['filings']:
-                recent_filings = submissions['filings']['recent']
-                accession_numbers = recent_filings.get('accessionNumber', [])
-                filing_dates = recent_filings.get('filingDate', [])
-                form_types = recent_filings.get('form', [])
-                primary_documents = recent_filings.get('primaryDocument', [])
-
-                filing_counts = {form_type: 0 for form_type in FORM_TYPES}
-
-                for i, accession_number_raw in enumerate(accession_numbers):
-                    form_type = form_types[i]
-
-                    if form_type in FORM_TYPES and filing_counts[form_type] < FILINGS_PER_TYPE:
-                        accession_number = accession_number_raw.replace("-", "")
-                        filing_date = filing_dates[i]
-                        primary_document = primary_documents[i]
-                        
-                        try:
-                            # Get the full filing content
-                            filing_content = get_filing_content(cik, accession_number_raw, primary_document)
-                            
-                            # Define the output path
-                            filename = f"{accession_number}_{form_type.replace('/', '_')}_{filing_date}.txt"
-                            output_path = os.path.join(output_dir, filename)
-                            
-                            # Save the filing content
-                            with open(output_path, "w", encoding="utf-8") as f:
-                                f.write(filing_content)
-                            
-                            print(f"    ({filing_counts[form_type] + 1}/{FILINGS_PER_TYPE}) Downloaded {form_type}: {filename}")
-                            filing_counts[form_type] += 1
-                            
-                            # Adhere to SEC rate limits
-                            time.sleep(0.1) 
-                            
-                        except requests.exceptions.HTTPError as e:
-                            print(f"    HTTP Error downloading filing {accession_number_raw}: {e}")
-                        except Exception as e:
-                            print(f"    Error processing filing {accession_number_raw}: {e}")
-            else:
-                print(f"  No recent filings found for {company_name}.")
-                
-        except requests.exceptions.HTTPError as e:
-            print(f"  HTTP Error fetching submissions for {company_name}: {e}")
-        except Exception as e:
-            print(f"  Error processing {company_name}: {e}")
+    asyncio.run(download_all_filings(SAVE_DIR))
 
     print("\n--- SEC Filing Download Complete ---")
 
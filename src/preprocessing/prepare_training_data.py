@@ -8,29 +8,335 @@ Date: 2025
 """
 
 import os
-import sys
 import json
+import argparse
+import functools
+import hashlib
 import logging
-import pandas as pd
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import re
 from datetime import datetime
-
-# Add project root to path
-sys.path.append(str(Path(__file__).resolve().parents[2]))
+from concurrent.futures import ProcessPoolExecutor
+import ahocorasick
 
 from src.utils.config_utils import load_config
-from src.utils.file_utils import ensure_directory
+from src.utils.file_utils import ensure_directory, prefetch_files
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Keywords for the SEC filing sentiment heuristic
+POSITIVE_KEYWORDS = (
+    'increase', 'growth', 'improve', 'positive', 'strong', 'profit', 'revenue',
+    'success', 'gain', 'up', 'higher', 'better', 'excellent', 'outperform'
+)
+
+NEGATIVE_KEYWORDS = (
+    'decrease', 'decline', 'loss', 'negative', 'weak', 'risk', 'challenge',
+    'down', 'lower', 'worse', 'poor', 'underperform', 'volatility'
+)
+
+def build_keyword_automaton() -> ahocorasick.Automaton:
+    """Build an Aho-Corasick automaton mapping each keyword to (keyword, +1/-1)"""
+    automaton = ahocorasick.Automaton()
+    for keyword in POSITIVE_KEYWORDS:
+        automaton.add_word(keyword, (keyword, 1))
+    for keyword in NEGATIVE_KEYWORDS:
+        automaton.add_word(keyword, (keyword, -1))
+    automaton.make_automaton()
+    return automaton
+
+# Matches every keyword in a single pass over the text
+KEYWORD_AUTOMATON = build_keyword_automaton()
+
+def find_keywords(text: str) -> Dict[str, int]:
+    """
+    Find the keywords that occur in text as whole words.
+    Returns {keyword: +1/-1}
+    """
+    found = {}
+    for end, (keyword, sign) in KEYWORD_AUTOMATON.iter(text):
+        # Only whole words count, so 'up' doesn't match inside 'group' or 'setup'
+        start = end - len(keyword) + 1
+        if start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+            continue
+        if end + 1 < len(text) and (text[end + 1].isalnum() or text[end + 1] == '_'):
+            continue
+        found[keyword] = sign
+    return found
+
+# Version tag stored with every training example
+DATASET_VERSION = '1.0'
+
+# Examples buffered before each write to the output files
+WRITE_BATCH_SIZE = 1000
+
+# Worker processes used to clean and score SEC filings
+MAX_WORKERS = os.cpu_count()
+
+# Filings handed to a worker at a time, to amortize inter-process overhead
+FILINGS_PER_TASK = 16
+
+# Distinct texts remembered by clean_text
+CLEAN_TEXT_CACHE_SIZE = 200_000
+
+# Characters kept by clean_text (FinBERT has token limits)
+MAX_TEXT_LENGTH = 5000
+
+# Characters read from a filing at a time
+FILING_READ_CHUNK = 64 * 1024
+
+# Runs of whitespace, or single characters that might interfere with tokenization;
+# both are replaced with one space in a single pass
+CLEAN_TEXT_PATTERN = re.compile(r'\s+|[^\w\s\.\,\!\?\;\:\-\(\)\[\]\{\}]')
+
+@functools.lru_cache(maxsize=CLEAN_TEXT_CACHE_SIZE)
+def clean_text(text: str) -> str:
+    """
+    Clean and normalize text for training.
+    Memoized, since the same short descriptions and boilerplate recur across sources.
+    """
+    if not text:
+        return ""
+    
+    # Collapse whitespace and blank out special characters (quotes, dashes and
+    # HTML angle brackets included)
+    text = CLEAN_TEXT_PATTERN.sub(' ', text)
+    
+    # Limit text length (FinBERT has token limits)
+    if len(text) > MAX_TEXT_LENGTH:
+        text = text[:MAX_TEXT_LENGTH] + "..."
+    
+    return text.strip()
+
+def read_filing_head(filing_file: Path) -> str:
+    """
+    Read the start of a filing, just long enough that cleaning it gives the same
+    result as cleaning the whole file, since clean_text drops everything past
+    MAX_TEXT_LENGTH anyway.
+    """
+    content = ''
+    with open(filing_file, 'r', encoding='utf-8') as f:
+        while chunk := f.read(FILING_READ_CHUNK):
+            content += chunk
+            # Only a whitespace run cut off at the end can still change once more is
+            # read, so everything but the last cleaned character is final
+            if len(CLEAN_TEXT_PATTERN.sub(' ', content)) > MAX_TEXT_LENGTH + 1:
+                break
+    return content
+
+def extract_sentiment_from_sec_filing(content: str, form_type: str) -> Tuple[str, str]:
+    """
+    Extract sentiment from SEC filing content.
+    Returns (cleaned_text, sentiment_label)
+    """
+    # Clean the content; whole filings are large and unique, so skip the memo cache
+    # rather than pin their raw text in it
+    cleaned_content = clean_text.__wrapped__(content)
+    
+    # Simple sentiment analysis based on form type and content keywords
+    # This is a basic heuristic - in production, you might use a more sophisticated approach
+    
+    # Count how many distinct positive / negative keywords appear, in one scan of the text
+    found = find_keywords(cleaned_content.lower())
+    positive_count = sum(1 for sign in found.values() if sign > 0)
+    negative_count = len(found) - positive_count
+    
+    # Determine sentiment based on form type and keyword analysis
+    if form_type == "10-K":
+        # Annual reports are generally neutral/informational
+        sentiment = "neutral"
+    elif form_type == "10-Q":
+        # Quarterly reports can be more dynamic
+        if positive_count > negative_count + 2:
+            sentiment = "positive"
+        elif negative_count > positive_count + 2:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+    elif form_type == "8-K":
+        # Current reports often contain significant events
+        if positive_count > negative_count:
+            sentiment = "positive"
+        elif negative_count > positive_count:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+    else:
+        sentiment = "neutral"
+    
+    return cleaned_content, sentiment
+
+def iter_paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yield the stripped, non-empty blank-line separated paragraphs of a text file,
+    holding only one paragraph in memory at a time.
+    """
+    paragraph = []
+    for line in lines:
+        if line == '\n' and paragraph and paragraph[-1].endswith('\n'):
+            text = ''.join(paragraph).strip()
+            if text:
+                yield text
+            paragraph = []
+        else:
+            paragraph.append(line)
+    text = ''.join(paragraph).strip()
+    if text:
+        yield text
+
+def process_sec_filing(filing_file: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read one SEC filing and turn it into a training example.
+    Runs in worker processes, so it only touches its own file.
+    Returns None when the filing is unusable.
+    """
+    try:
+        # Parse filename to extract metadata
+        filename = filing_file.stem
+        parts = filename.split('_')
+        
+        if len(parts) < 3:
+            return None
+        
+        accession_number = parts[0]
+        form_type = parts[1]
+        filing_date = parts[2]
+        
+        # Read filing content
+        content = read_filing_head(filing_file)
+        
+        # Extract sentiment and clean text
+        cleaned_text, sentiment = extract_sentiment_from_sec_filing(content, form_type)
+        
+        if not cleaned_text or len(cleaned_text) <= 100:  # Minimum length threshold
+            return None
+        
+        return {
+            'text': cleaned_text,
+            'label': sentiment,
+            'source': 'sec_filing',
+            'metadata': {
+                'accession_number': accession_number,
+                'form_type': form_type,
+                'filing_date': filing_date,
+                'filename': filename
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"Error processing {filing_file}: {e}")
+        return None
+
+class TrainingDataWriter:
+    """
+    Streams training examples to CSV and Parquet (and optionally JSON Lines) as they are produced.
+    
+    Duplicate texts are dropped as they arrive (the first occurrence wins), tracked by
+    a set of 16-byte digests, so memory holds one batch of examples rather than the
+    whole dataset. Files are only created once the first batch is written.
+    """
+    SCHEMA = pa.schema([
+        ('text', pa.string()),
+        ('label', pa.string()),
+        ('source', pa.string()),
+        ('metadata', pa.string()),
+        ('created_at', pa.string()),
+        ('dataset_version', pa.string())
+    ])
+    
+    def __init__(self, output_dir: str, batch_size: int = WRITE_BATCH_SIZE, save_json: bool = False):
+        self.csv_path = os.path.join(output_dir, 'training_data.csv')
+        self.parquet_path = os.path.join(output_dir, 'training_data.parquet')
+        self.json_path = os.path.join(output_dir, 'training_data.jsonl') if save_json else None
+        self.batch_size = batch_size
+        self.created_at = datetime.now().isoformat()
+        
+        self.total_examples = 0
+        self.duplicate_count = 0
+        self.label_counts = Counter()
+        self.source_counts = Counter()
+        
+        self._seen = set()
+        self._batch = []
+        self._csv_writer = None
+        self._parquet_writer = None
+        self._json_file = None
+    
+    def add(self, example: Dict[str, Any]) -> bool:
+        """Queue an example for writing; returns False if its text was already written"""
+        digest = hashlib.blake2b(example['text'].encode(), digest_size=16).digest()
+        if digest in self._seen:
+            self.duplicate_count += 1
+            return False
+        self._seen.add(digest)
+        
+        self._batch.append({
+            'text': example['text'],
+            'label': example['label'],
+            'source': example['source'],
+            'metadata': orjson.dumps(example['metadata']).decode(),
+            'created_at': self.created_at,
+            'dataset_version': DATASET_VERSION
+        })
+        self.total_examples += 1
+        self.label_counts[example['label']] += 1
+        self.source_counts[example['source']] += 1
+        
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        return True
+    
+    def flush(self) -> None:
+        """Write the queued examples to every output file"""
+        if not self._batch:
+            return
+        
+        if self._csv_writer is None:
+            self._csv_writer = pa_csv.CSVWriter(self.csv_path, self.SCHEMA)
+            self._parquet_writer = pq.ParquetWriter(self.parquet_path, self.SCHEMA, compression='zstd')
+            if self.json_path:
+                self._json_file = open(self.json_path, 'wb')
+        
+        batch = pa.RecordBatch.from_pylist(self._batch, schema=self.SCHEMA)
+        self._csv_writer.write_batch(batch)
+        self._parquet_writer.write_batch(batch)
+        
+        # JSON Lines (for HuggingFace datasets): one record per line, no pretty-printing
+        if self._json_file is not None:
+            self._json_file.write(b''.join(orjson.dumps(row) + b'\n' for row in self._batch))
+        self._batch = []
+    
+    def close(self) -> None:
+        """Flush any remaining examples and close the output files"""
+        self.flush()
+        if self._csv_writer is not None:
+            self._csv_writer.close()
+            self._parquet_writer.close()
+        if self._json_file is not None:
+            self._json_file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
 class TrainingDataPreparer:
-    def __init__(self):
+    def __init__(self, save_json: bool = False):
         self.config = load_config()
         
+        # Also export the training data as JSON Lines
+        self.save_json = save_json
+        
         # Input directories
         self.input_dirs = {
             'sec_filings': 'data/raw/wealth_data/sec_filings',
@@ -42,83 +348,19 @@ class TrainingDataPreparer:
         self.output_dir = 'data/processed/wealth_data'
         ensure_directory(self.output_dir)
         
-        # Training data containers
-        self.training_data = []
+        # Streaming writer for the training examples, opened by run_preprocessing
+        self.writer = None
         
     def clean_text(self, text: str) -> str:
         """Clean and normalize text for training"""
-        if not text:
-            return ""
-        
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove special characters that might interfere with tokenization
-        text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\{\}]', ' ', text)
-        
-        # Normalize quotes and dashes
-        text = text.replace('"', '"').replace('"', '"')
-        text = text.replace('–', '-').replace('—', '-')
-        
-        # Remove HTML-like tags
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Limit text length (FinBERT has token limits)
-        if len(text) > 5000:
-            text = text[:5000] + "..."
-        
-        return text.strip()
+        return clean_text(text)
     
     def extract_sentiment_from_sec_filing(self, content: str, form_type: str) -> Tuple[str, str]:
         """
         Extract sentiment from SEC filing content.
         Returns (cleaned_text, sentiment_label)
         """
-        # Clean the content
-        cleaned_content = self.clean_text(content)
-        
-        # Simple sentiment analysis based on form type and content keywords
-        # This is a basic heuristic - in production, you might use a more sophisticated approach
-        
-        positive_keywords = [
-            'increase', 'growth', 'improve', 'positive', 'strong', 'profit', 'revenue',
-            'success', 'gain', 'up', 'higher', 'better', 'excellent', 'outperform'
-        ]
-        
-        negative_keywords = [
-            'decrease', 'decline', 'loss', 'negative', 'weak', 'risk', 'challenge',
-            'down', 'lower', 'worse', 'poor', 'underperform', 'volatility'
-        ]
-        
-        # Count keyword occurrences
-        content_lower = cleaned_content.lower()
-        positive_count = sum(1 for word in positive_keywords if word in content_lower)
-        negative_count = sum(1 for word in negative_keywords if word in content_lower)
-        
-        # Determine sentiment based on form type and keyword analysis
-        if form_type == "10-K":
-            # Annual reports are generally neutral/informational
-            sentiment = "neutral"
-        elif form_type == "10-Q":
-            # Quarterly reports can be more dynamic
-            if positive_count > negative_count + 2:
-                sentiment = "positive"
-            elif negative_count > positive_count + 2:
-                sentiment = "negative"
-            else:
-                sentiment = "neutral"
-        elif form_type == "8-K":
-            # Current reports often contain significant events
-            if positive_count > negative_count:
-                sentiment = "positive"
-            elif negative_count > positive_count:
-                sentiment = "negative"
-            else:
-                sentiment = "neutral"
-        else:
-            sentiment = "neutral"
-        
-        return cleaned_content, sentiment
+        return extract_sentiment_from_sec_filing(content, form_type)
     
     def process_sec_filings(self) -> int:
         """Process SEC filings and extract training examples"""
@@ -130,47 +372,24 @@ class TrainingDataPreparer:
             return 0
         
         processed_count = 0
-        
-        for filing_file in sec_dir.glob('*.txt'):
-            try:
-                # Parse filename to extract metadata
-                filename = filing_file.stem
-                parts = filename.split('_')
+        filing_files = list(sec_dir.glob('*.txt'))
+        
+        # Queue every filing's first read with the kernel before the workers start opening
+        # them; read_filing_head rarely needs more than the first chunk
+        prefetch_files(filing_files, FILING_READ_CHUNK)
+        
+        # Each filing is independent CPU-bound work (cleaning + keyword scoring), so spread
+        # them across processes; map keeps the original file order for deterministic output
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for training_example in executor.map(process_sec_filing, filing_files, chunksize=FILINGS_PER_TASK):
+                if training_example is None:
+                    continue
                 
-                if len(parts) >= 3:
-                    accession_number = parts[0]
-                    form_type = parts[1]
-                    filing_date = parts[2]
-                    
-                    # Read filing content
-                    with open(filing_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Extract sentiment and clean text
-                    cleaned_text, sentiment = self.extract_sentiment_from_sec_filing(content, form_type)
-                    
-                    if cleaned_text and len(cleaned_text) > 100:  # Minimum length threshold
-                        training_example = {
-                            'text': cleaned_text,
-                            'label': sentiment,
-                            'source': 'sec_filing',
-                            'metadata': {
-                                'accession_number': accession_number,
-                                'form_type': form_type,
-                                'filing_date': filing_date,
-                                'filename': filename
-                            }
-                        }
-                        
-                        self.training_data.append(training_example)
-                        processed_count += 1
-                        
-                        if processed_count % 10 == 0:
-                            logger.info(f"Processed {processed_count} SEC filings...")
+                self.writer.add(training_example)
+                processed_count += 1
                 
-            except Exception as e:
-                logger.error(f"Error processing {filing_file}: {e}")
-                continue
+                if processed_count % 10 == 0:
+                    logger.info(f"Processed {processed_count} SEC filings...")
         
         logger.info(f"Completed SEC filings processing: {processed_count} examples")
         return processed_count
@@ -191,28 +410,24 @@ class TrainingDataPreparer:
         if combined_file.exists():
             try:
                 with open(combined_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Split into individual descriptions
-                descriptions = [desc.strip() for desc in content.split('\n\n') if desc.strip()]
-                
-                for desc in descriptions:
-                    cleaned_text = self.clean_text(desc)
-                    
-                    if cleaned_text and len(cleaned_text) > 50:
-                        # Economic data is generally neutral/informational
-                        training_example = {
-                            'text': cleaned_text,
-                            'label': 'neutral',
-                            'source': 'fred_data',
-                            'metadata': {
-                                'data_type': 'economic_indicator',
-                                'description_length': len(cleaned_text)
-                            }
-                        }
+                    # Stream the individual descriptions instead of splitting the whole file
+                    for desc in iter_paragraphs(f):
+                        cleaned_text = self.clean_text(desc)
                         
-                        self.training_data.append(training_example)
-                        processed_count += 1
+                        if cleaned_text and len(cleaned_text) > 50:
+                            # Economic data is generally neutral/informational
+                            training_example = {
+                                'text': cleaned_text,
+                                'label': 'neutral',
+                                'source': 'fred_data',
+                                'metadata': {
+                                    'data_type': 'economic_indicator',
+                                    'description_length': len(cleaned_text)
+                                }
+                            }
+                            
+                            self.writer.add(training_example)
+                            processed_count += 1
                 
             except Exception as e:
                 logger.error(f"Error processing FRED combined file: {e}")
@@ -254,7 +469,7 @@ class TrainingDataPreparer:
                                 }
                             }
                             
-                            self.training_data.append(training_example)
+                            self.writer.add(training_example)
                             processed_count += 1
                 
             except Exception as e:
@@ -264,113 +479,81 @@ class TrainingDataPreparer:
         logger.info(f"Completed policy uncertainty processing: {processed_count} examples")
         return processed_count
     
-    def create_training_dataset(self) -> pd.DataFrame:
-        """Create final training dataset"""
-        logger.info("Creating final training dataset...")
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(self.training_data)
-        
-        if df.empty:
-            logger.warning("No training data was created")
-            return df
-        
-        # Add dataset metadata
-        df['created_at'] = datetime.now().isoformat()
-        df['dataset_version'] = '1.0'
-        
-        # Ensure we have the required columns for FinBERT
-        required_columns = ['text', 'label']
-        for col in required_columns:
-            if col not in df.columns:
-                logger.error(f"Missing required column: {col}")
-                return pd.DataFrame()
-        
-        # Remove duplicates
-        initial_count = len(df)
-        df = df.drop_duplicates(subset=['text'])
-        final_count = len(df)
-        
-        if initial_count != final_count:
-            logger.info(f"Removed {initial_count - final_count} duplicate entries")
-        
-        # Label distribution
-        label_counts = df['label'].value_counts()
-        logger.info("Label distribution:")
-        for label, count in label_counts.items():
-            logger.info(f"  {label}: {count} ({count/len(df)*100:.1f}%)")
-        
-        return df
-    
-    def save_training_data(self, df: pd.DataFrame) -> str:
-        """Save training data in multiple formats"""
-        if df.empty:
-            logger.warning("No data to save")
-            return ""
-        
-        # Save as CSV
-        csv_path = os.path.join(self.output_dir, 'training_data.csv')
-        df.to_csv(csv_path, index=False)
-        
-        # Save as JSON (for HuggingFace datasets)
-        json_path = os.path.join(self.output_dir, 'training_data.json')
-        df.to_json(json_path, orient='records', indent=2)
-        
-        # Save metadata
+    def save_metadata(self) -> str:
+        """Save dataset metadata next to the training data"""
         metadata = {
-            'total_examples': len(df),
-            'label_distribution': df['label'].value_counts().to_dict(),
-            'source_distribution': df['source'].value_counts().to_dict(),
+            'total_examples': self.writer.total_examples,
+            'label_distribution': dict(self.writer.label_counts.most_common()),
+            'source_distribution': dict(self.writer.source_counts.most_common()),
             'created_at': datetime.now().isoformat(),
-            'dataset_version': '1.0'
+            'dataset_version': DATASET_VERSION
         }
         
         metadata_path = os.path.join(self.output_dir, 'dataset_metadata.json')
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        logger.info(f"Training data saved:")
-        logger.info(f"  CSV: {csv_path}")
-        logger.info(f"  JSON: {json_path}")
-        logger.info(f"  Metadata: {metadata_path}")
-        
-        return csv_path
+        with open(metadata_path, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+        return metadata_path
     
     def run_preprocessing(self) -> Dict[str, Any]:
         """Run the complete preprocessing pipeline"""
         logger.info("🚀 Starting Training Data Preparation")
         
-        # Process each data source
-        counts = {
-            'sec_filings': self.process_sec_filings(),
-            'fred_data': self.process_fred_data(),
-            'policy_uncertainty': self.process_policy_uncertainty()
-        }
-        
-        # Create final dataset
-        df = self.create_training_dataset()
-        
-        # Save data
-        output_path = self.save_training_data(df)
+        # Process each data source, streaming examples straight to disk
+        self.writer = TrainingDataWriter(self.output_dir, save_json=self.save_json)
+        with self.writer:
+            counts = {
+                'sec_filings': self.process_sec_filings(),
+                'fred_data': self.process_fred_data(),
+                'policy_uncertainty': self.process_policy_uncertainty()
+            }
+        
+        total_examples = self.writer.total_examples
+        label_distribution = dict(self.writer.label_counts.most_common())
+        
+        if self.writer.duplicate_count:
+            logger.info(f"Removed {self.writer.duplicate_count} duplicate entries")
+        
+        if total_examples:
+            logger.info("Label distribution:")
+            for label, count in label_distribution.items():
+                logger.info(f"  {label}: {count} ({count/total_examples*100:.1f}%)")
+            
+            metadata_path = self.save_metadata()
+            output_path = self.writer.csv_path
+            
+            logger.info(f"Training data saved:")
+            logger.info(f"  CSV: {self.writer.csv_path}")
+            logger.info(f"  Parquet: {self.writer.parquet_path}")
+            if self.writer.json_path:
+                logger.info(f"  JSON: {self.writer.json_path}")
+            logger.info(f"  Metadata: {metadata_path}")
+        else:
+            logger.warning("No training data was created")
+            output_path = ""
         
         # Summary
-        total_examples = len(df)
+        cache_info = clean_text.cache_info()
         logger.info("=== PREPROCESSING COMPLETE ===")
         logger.info(f"Total training examples: {total_examples}")
         logger.info(f"SEC filings processed: {counts['sec_filings']}")
         logger.info(f"FRED data processed: {counts['fred_data']}")
         logger.info(f"Policy uncertainty processed: {counts['policy_uncertainty']}")
+        logger.info(f"clean_text cache: {cache_info.hits} hits, {cache_info.misses} misses")
         
         return {
             'total_examples': total_examples,
             'counts': counts,
             'output_path': output_path,
-            'label_distribution': df['label'].value_counts().to_dict() if not df.empty else {}
+            'label_distribution': label_distribution
         }
 
-def main():
+def main(argv=None):
     """Main entry point"""
-    preparer = TrainingDataPreparer()
+    parser = argparse.ArgumentParser(description="Prepare FinBERT training data from collected sources")
+    parser.add_argument("--json", action="store_true", help="Also write the training data as JSON Lines")
+    args = parser.parse_args(argv)
+    
+    preparer = TrainingDataPreparer(save_json=args.json)
     results = preparer.run_preprocessing()
     
     # Print summary
@@ -1,6 +1,4 @@
-import sys
 from pathlib import Path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("sklearn")
+
+class FakeTokenizer:
+    """Stand-in for a tokenizer; only its contents feed the cache key."""
+
+    def __init__(self, name_or_path, vocab_size=30522):
+        self.name_or_path = name_or_path
+        self.vocab_size = vocab_size
+
+def test_tokenized_cache_file_invalidation(tmp_path, monkeypatch):
+    """Test that the tokenized split cache file changes with everything the split depends on."""
+    try:
+        from src.training import finetune_model
+    except SystemExit:
+        pytest.skip("training configuration not available")
+
+    training_data = tmp_path / "training_data.csv"
+    training_data.write_text("text,label\nProfits rose,positive\n")
+    monkeypatch.setattr(finetune_model, "TRAINING_DATA_PATH", str(training_data))
+    tokenizer = FakeTokenizer(str(tmp_path))
+
+    cache_file = finetune_model.tokenized_cache_file("train", tokenizer)
+    assert cache_file == finetune_model.tokenized_cache_file("train", tokenizer)
+    assert os.path.dirname(cache_file) == str(tmp_path)
+    assert cache_file != finetune_model.tokenized_cache_file("val", tokenizer)
+
+    assert cache_file != finetune_model.tokenized_cache_file("train", FakeTokenizer(str(tmp_path), vocab_size=100))
+
+    stat = training_data.stat()
+    os.utime(training_data, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    retouched_cache_file = finetune_model.tokenized_cache_file("train", tokenizer)
+    assert cache_file != retouched_cache_file
+
+    monkeypatch.setattr(finetune_model, "SPLIT_SEED", finetune_model.SPLIT_SEED + 1)
+    assert retouched_cache_file != finetune_model.tokenized_cache_file("train", tokenizer)
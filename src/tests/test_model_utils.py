@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from transformers import BatchEncoding
+
+from src.utils import model_utils
+
+class FakeTokenizer:
+    """Minimal word-level tokenizer saved in a directory, counting how often it actually runs."""
+
+    def __init__(self, name_or_path, vocab_size=30522):
+        self.name_or_path = name_or_path
+        self.vocab_size = vocab_size
+        self.calls = 0
+
+    def __len__(self):
+        return self.vocab_size
+
+    def __call__(self, texts, return_tensors="pt", truncation=True, padding=True, max_length=512):
+        self.calls += 1
+        # One non-zero id per word, padded on the right with 0 like BERT tokenizers
+        ids = [[len(word) + 1 for word in text.split()][:max_length] for text in texts]
+        width = max(map(len, ids))
+        input_ids = torch.tensor([row + [0] * (width - len(row)) for row in ids])
+        return BatchEncoding({"input_ids": input_ids, "attention_mask": (input_ids != 0).long()})
+
+def save_vocab(directory, contents):
+    (directory / "vocab.txt").write_text(contents)
+
+def test_tokenize_cached_reuses_cache(tmp_path, monkeypatch):
+    """Test that tokenizing the same texts again is served from the cache."""
+    monkeypatch.setattr(model_utils, "TOKENIZED_CACHE_DIR", str(tmp_path / "cache"))
+    save_vocab(tmp_path, "[PAD]\nprofit\n")
+    tokenizer = FakeTokenizer(str(tmp_path))
+
+    first = model_utils.tokenize_cached(["profit rose"], tokenizer)
+    second = model_utils.tokenize_cached(["profit rose"], tokenizer)
+
+    assert tokenizer.calls == 1
+    assert torch.equal(first["input_ids"], second["input_ids"])
+
+def test_tokenize_cached_invalidation(tmp_path, monkeypatch):
+    """Test that changing the texts, max length or tokenizer files misses the cache."""
+    monkeypatch.setattr(model_utils, "TOKENIZED_CACHE_DIR", str(tmp_path / "cache"))
+    save_vocab(tmp_path, "[PAD]\nprofit\n")
+    tokenizer = FakeTokenizer(str(tmp_path))
+
+    model_utils.tokenize_cached(["profit rose"], tokenizer)
+    model_utils.tokenize_cached(["profit fell"], tokenizer)
+    assert tokenizer.calls == 2
+
+    model_utils.tokenize_cached(["profit rose"], tokenizer, max_length=128)
+    assert tokenizer.calls == 3
+
+    # Re-saving the tokenizer into the same directory with a different vocab
+    save_vocab(tmp_path, "[PAD]\nprofit\nloss\n")
+    model_utils.tokenize_cached(["profit rose"], tokenizer)
+    assert tokenizer.calls == 4
+
+class FakeModel:
+    """Classifier scoring texts on their real tokens: five per token against the sum of their ids."""
+
+    def __init__(self):
+        self.config = SimpleNamespace(num_labels=2, id2label={0: "negative", 1: "positive"})
+        self.device = torch.device("cpu")
+        self.batch_shapes = []
+
+    def __call__(self, input_ids, attention_mask):
+        self.batch_shapes.append(tuple(input_ids.shape))
+        token_scores = attention_mask.sum(dim=1).float() * 5
+        return SimpleNamespace(logits=torch.stack([token_scores, input_ids.sum(dim=1).float()], dim=1))
+
+# Deliberately not sorted by length, so predict_logits has to reorder them
+MIXED_LENGTH_TEXTS = [
+    "profits rose sharply across every segment this quarter",
+    "up",
+    "losses widened",
+    "it is on hold",
+    "the outlook remains uncertain",
+    "guidance unchanged",
+]
+
+def expected_logits(text):
+    words = text.split()
+    return [float(len(words) * 5), float(sum(len(word) + 1 for word in words))]
+
+def test_predict_logits_keeps_input_order(tmp_path, monkeypatch):
+    """Test that length-sorted batching returns logits in the order the texts were given."""
+    monkeypatch.setattr(model_utils, "TOKENIZED_CACHE_DIR", str(tmp_path / "cache"))
+    model = FakeModel()
+
+    logits = model_utils.predict_logits(MIXED_LENGTH_TEXTS, model, FakeTokenizer(str(tmp_path)), batch_size=2)
+
+    assert logits.tolist() == [expected_logits(text) for text in MIXED_LENGTH_TEXTS]
+    # Batches are trimmed to their own longest text rather than the longest overall
+    assert model.batch_shapes == [(2, 2), (2, 4), (2, 8)]
+
+def test_predict_sentiment_keeps_input_order(tmp_path, monkeypatch):
+    """Test that predict_sentiment labels each text in input order."""
+    from src.analysis.run_inference_examples import predict_sentiment
+
+    monkeypatch.setattr(model_utils, "TOKENIZED_CACHE_DIR", str(tmp_path / "cache"))
+    model = FakeModel()
+
+    labels = [label for label, _ in predict_sentiment(MIXED_LENGTH_TEXTS, model, FakeTokenizer(str(tmp_path)))]
+
+    assert labels == ["positive", "negative", "positive", "negative", "positive", "positive"]
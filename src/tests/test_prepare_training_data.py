@@ -0,0 +1,36 @@
+import pyarrow.parquet as pq
+
+from src.preprocessing.prepare_training_data import TrainingDataWriter, find_keywords
+
+def make_example(text, label="positive", source="sec_filing"):
+    return {"text": text, "label": label, "source": source, "metadata": {"form_type": "10-K"}}
+
+def test_find_keywords_whole_words():
+    """Test that keywords only count when they occur as whole words (text is lowercased by the caller)."""
+    assert find_keywords("revenue growth was strong") == {"revenue": 1, "growth": 1, "strong": 1}
+    assert find_keywords("risk: losses went up, not down.") == {"risk": -1, "up": 1, "down": -1}
+
+def test_find_keywords_ignores_substrings():
+    """Test that keywords inside longer words or identifiers are not matched."""
+    assert find_keywords("The group completed its setup") == {}
+    assert find_keywords("uptime downtime risky gains") == {}
+    assert find_keywords("growth_rate up_to loss2") == {}
+    assert find_keywords("") == {}
+
+def test_training_data_writer_drops_duplicates(tmp_path):
+    """Test that TrainingDataWriter keeps the first occurrence of each text."""
+    with TrainingDataWriter(str(tmp_path), batch_size=2) as writer:
+        assert writer.add(make_example("Profits rose sharply"))
+        assert writer.add(make_example("Losses widened", label="negative"))
+        # Duplicate in a later batch, with a different label, is still dropped
+        assert not writer.add(make_example("Profits rose sharply", label="negative"))
+        assert writer.add(make_example("Guidance unchanged", label="neutral"))
+        assert not writer.add(make_example("Losses widened", label="negative"))
+
+    assert writer.total_examples == 3
+    assert writer.duplicate_count == 2
+    assert writer.label_counts == {"positive": 1, "negative": 1, "neutral": 1}
+
+    table = pq.read_table(writer.parquet_path)
+    assert table.column("text").to_pylist() == ["Profits rose sharply", "Losses widened", "Guidance unchanged"]
+    assert table.column("label").to_pylist() == ["positive", "negative", "neutral"]
@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from src.utils.secure_data_utils import (
+    SecureDataError, decrypt_data_aesgcm, encrypt_data_aesgcm, generate_data_key,
+    pack_salted, secure_load, secure_save, unpack_salted, verify_data_integrity
+)
+
+SAMPLE_DATA = {"portfolio": "growth", "weights": [0.6, 0.4], "nested": {"risk": "medium"}}
+
+def sign(data, key):
+    """Sign data the way verify_data_integrity expects: HMAC-SHA256 of the sorted-key JSON."""
+    return hmac.new(key.encode(), json.dumps(data, sort_keys=True).encode(), hashlib.sha256).hexdigest()
+
+def test_pack_unpack_salted_round_trip():
+    """Test that unpack_salted returns the salt and ciphertext given to pack_salted."""
+    salt = b"\x00salt\xff" * 3
+    encrypted_data = b"ciphertext bytes"
+
+    assert unpack_salted(pack_salted(salt, encrypted_data)) == (salt, encrypted_data)
+    assert unpack_salted(pack_salted(b"", b"")) == (b"", b"")
+
+def test_unpack_salted_legacy_data():
+    """Test that data without the salted header is reported as a legacy file."""
+    assert unpack_salted(b"gAAAAAB-legacy-fernet-token") is None
+
+def test_aesgcm_round_trip():
+    """Test that AES-GCM encryption round-trips and uses a fresh nonce each time."""
+    key = generate_data_key()
+    encrypted = encrypt_data_aesgcm(SAMPLE_DATA, key)
+
+    assert decrypt_data_aesgcm(encrypted, key) == SAMPLE_DATA
+    assert encrypt_data_aesgcm(SAMPLE_DATA, key) != encrypted
+
+def test_aesgcm_rejects_tampering_and_wrong_key():
+    """Test that modified ciphertext or the wrong key fails authentication."""
+    key = generate_data_key()
+    encrypted = bytearray(encrypt_data_aesgcm(SAMPLE_DATA, key))
+
+    with pytest.raises(SecureDataError):
+        decrypt_data_aesgcm(bytes(encrypted), generate_data_key())
+
+    encrypted[-1] ^= 1
+    with pytest.raises(SecureDataError):
+        decrypt_data_aesgcm(bytes(encrypted), key)
+
+def test_secure_save_load_round_trip(tmp_path):
+    """Test that secure_load reads back the single salted file secure_save wrote."""
+    filepath = str(tmp_path / "data.enc")
+    secure_save(SAMPLE_DATA, filepath, "correct horse battery staple")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["data.enc"]
+    assert secure_load(filepath, "correct horse battery staple") == SAMPLE_DATA
+    with pytest.raises(SecureDataError):
+        secure_load(filepath, "wrong password")
+
+def test_verify_data_integrity_signatures(monkeypatch):
+    """Test verify_data_integrity with good, bad and malformed signatures."""
+    monkeypatch.setenv("DATA_INTEGRITY_KEY", "integrity-test-key")
+    signature = sign(SAMPLE_DATA, "integrity-test-key")
+
+    assert verify_data_integrity(SAMPLE_DATA, signature)
+    assert verify_data_integrity(SAMPLE_DATA, signature.upper())
+    assert not verify_data_integrity({**SAMPLE_DATA, "portfolio": "income"}, signature)
+    assert not verify_data_integrity(SAMPLE_DATA, sign(SAMPLE_DATA, "another-key"))
+    assert not verify_data_integrity(SAMPLE_DATA, "not hex at all")
+    assert not verify_data_integrity(SAMPLE_DATA, signature[:-1])
+    assert not verify_data_integrity(SAMPLE_DATA, "")
+
+def test_verify_data_integrity_requires_key(monkeypatch):
+    """Test that verify_data_integrity refuses to run without a key."""
+    monkeypatch.delenv("DATA_INTEGRITY_KEY", raising=False)
+
+    with pytest.raises(SecureDataError):
+        verify_data_integrity(SAMPLE_DATA, sign(SAMPLE_DATA, "integrity-test-key"))
@@ -8,9 +8,9 @@ Date: 2025
 import os
 import json
 import torch
-from pathlib import Path
 import sys
 from datetime import datetime
+from dataclasses import fields
 from typing import List, Dict, Any, Tuple, Optional
 import platform
 import pandas as pd
@@ -19,12 +19,11 @@ from sklearn.model_selection import train_test_split
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer, DataCollatorWithPadding
 from datasets import Dataset
+from datasets.fingerprint import Hasher
 import logging
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, classification_report
 import random
 
-# Add src to Python path for imports
-sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config_utils import load_config
 
 # Set up logging
@@ -44,7 +43,29 @@ except Exception as e:
 # Constants
 TRAINING_DATA_PATH = "data/processed/wealth_data/training_data.csv"
 MAX_LENGTH = 512  # FinBERT can handle longer sequences
+PAD_TO_MULTIPLE_OF = 8  # Keeps padded batch shapes aligned for tensor-core / MPS kernels
 LABEL_MAPPING = {"negative": 0, "neutral": 1, "positive": 2}
+VALIDATION_SIZE = 0.2  # Fraction of examples held out for validation
+SPLIT_SEED = 42
+TOKENIZE_NUM_PROC = min(8, os.cpu_count() or 1)  # Processes for the first, uncached tokenization pass
+TOKENIZE_PARALLEL_MIN_EXAMPLES = 10_000  # Smaller splits tokenize faster in a single process
+
+# TrainingArguments defaults; keys set in the config's training_args override them
+DEFAULT_TRAINING_ARGS = {
+    "num_train_epochs": 3,
+    "per_device_train_batch_size": 16,
+    "per_device_eval_batch_size": 16,
+    "gradient_accumulation_steps": 2,
+    "learning_rate": 2e-5,
+    "weight_decay": 0.01,
+    "warmup_steps": 100,
+    "logging_steps": 50,
+    "save_steps": 500,
+    "eval_steps": 500,
+    "save_total_limit": 2,
+    "dataloader_num_workers": min(4, max(0, (os.cpu_count() or 1) - 1)),  # Load batches off the training loop
+    "dataloader_pin_memory": False,  # Enabled on CUDA by finetune_model
+}
 
 def get_device():
     """Get the appropriate device for training based on system capabilities."""
@@ -55,6 +76,20 @@ def get_device():
     else:
         return torch.device("cpu")
 
+def get_mixed_precision(device: torch.device) -> Tuple[bool, bool]:
+    """
+    Pick the mixed precision mode for training on a device.
+    Returns (bf16, fp16); fp16/bf16 set explicitly in the config take precedence.
+    """
+    if device.type == "cuda":
+        bf16 = torch.cuda.is_bf16_supported()  # Ampere and newer
+        fp16 = not bf16
+    elif device.type == "mps":
+        bf16, fp16 = False, True
+    else:
+        bf16 = fp16 = False
+    return TRAINING_ARGS.get("bf16", bf16), TRAINING_ARGS.get("fp16", fp16)
+
 def load_training_data() -> pd.DataFrame:
     """Load the processed training data."""
     logger.info(f"Loading training data from {TRAINING_DATA_PATH}")
@@ -62,7 +97,12 @@ def load_training_data() -> pd.DataFrame:
     if not os.path.exists(TRAINING_DATA_PATH):
         raise FileNotFoundError(f"Training data not found at {TRAINING_DATA_PATH}")
     
-    df = pd.read_csv(TRAINING_DATA_PATH)
+    # Only parse the columns training uses; labels/sources are stored as categories
+    df = pd.read_csv(
+        TRAINING_DATA_PATH,
+        usecols=["text", "label", "source"],
+        dtype={"text": "string", "label": "category", "source": "category"}
+    )
     logger.info(f"Loaded {len(df)} training examples")
     
     # Display data distribution
@@ -83,8 +123,8 @@ def prepare_dataset(df: pd.DataFrame) -> Tuple[Dataset, Dataset]:
     # Split into train and validation sets
     train_df, val_df = train_test_split(
         df, 
-        test_size=0.2, 
-        random_state=42, 
+        test_size=VALIDATION_SIZE, 
+        random_state=SPLIT_SEED, 
         stratify=df['label_id']
     )
     
@@ -99,21 +139,31 @@ def prepare_dataset(df: pd.DataFrame) -> Tuple[Dataset, Dataset]:
 
 def preprocess_function(examples: Dict[str, Any], tokenizer: AutoTokenizer) -> Dict[str, Any]:
     """Tokenize and prepare examples for the model."""
-    # Tokenize the texts
-    tokenized = tokenizer(
+    # Tokenize the texts without padding; the data collator pads each batch
+    # only to its own longest sequence
+    return tokenizer(
         examples["text"],
         truncation=True,
-        padding="max_length",
-        max_length=MAX_LENGTH,
-        return_tensors="pt"
+        max_length=MAX_LENGTH
     )
+
+def tokenized_cache_file(split: str, tokenizer: AutoTokenizer) -> str:
+    """
+    Get the Arrow file a tokenized split is cached in between runs.
     
-    # Remove the batch dimension added by return_tensors="pt"
-    for key in tokenized:
-        if isinstance(tokenized[key], torch.Tensor):
-            tokenized[key] = tokenized[key].squeeze(0)
-    
-    return tokenized
+    datasets skips its fingerprint check when given an explicit cache file, so the name
+    hashes everything the split depends on: the model, max length, training data mtime,
+    split parameters, tokenizer contents and the code that prepares and tokenizes it.
+    """
+    fingerprint = Hasher.hash((
+        MODEL_NAME, MAX_LENGTH, os.path.getmtime(TRAINING_DATA_PATH), VALIDATION_SIZE, SPLIT_SEED,
+        tokenizer, prepare_dataset, preprocess_function
+    ))
+    return os.path.join(os.path.dirname(TRAINING_DATA_PATH), f"tok_{split}_{fingerprint[:12]}.arrow")
+
+def tokenize_num_proc(dataset: Dataset) -> Optional[int]:
+    """Get the number of processes to tokenize a split with; small splits stay in-process."""
+    return TOKENIZE_NUM_PROC if len(dataset) >= TOKENIZE_PARALLEL_MIN_EXAMPLES else None
 
 def compute_metrics(pred):
     """Compute evaluation metrics."""
@@ -141,6 +191,14 @@ def finetune_model():
     logger.info(f"Platform: {platform.platform()}")
     logger.info(f"Python version: {platform.python_version()}")
     
+    # Let any remaining float32 matmuls use TF32 tensor cores
+    if device.type == "cuda":
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.set_float32_matmul_precision("high")
+    
+    bf16, fp16 = get_mixed_precision(device)
+    logger.info(f"Mixed precision: bf16={bf16}, fp16={fp16}")
+    
     # Load training data
     df = load_training_data()
     
@@ -158,40 +216,52 @@ def finetune_model():
     # Move model to device
     model = model.to(device)
     
+    # Recompute activations in the backward pass instead of storing them, so larger
+    # batches fit in memory
+    model.gradient_checkpointing_enable()
+    
     # Tokenize datasets
     logger.info("Tokenizing datasets...")
     
     def tokenize_function(examples):
         return preprocess_function(examples, tokenizer)
     
-    train_dataset = train_dataset.map(tokenize_function, batched=True)
-    val_dataset = val_dataset.map(tokenize_function, batched=True)
-    
-    # Set up training arguments
-    training_args = TrainingArguments(
-        output_dir=OUTPUT_DIR,
-        num_train_epochs=TRAINING_ARGS.get("num_train_epochs", 3),
-        per_device_train_batch_size=TRAINING_ARGS.get("per_device_train_batch_size", 8),
-        per_device_eval_batch_size=TRAINING_ARGS.get("per_device_eval_batch_size", 8),
-        gradient_accumulation_steps=TRAINING_ARGS.get("gradient_accumulation_steps", 4),
-        learning_rate=TRAINING_ARGS.get("learning_rate", 2e-5),
-        weight_decay=TRAINING_ARGS.get("weight_decay", 0.01),
-        warmup_steps=TRAINING_ARGS.get("warmup_steps", 100),
-        logging_steps=TRAINING_ARGS.get("logging_steps", 50),
-        save_steps=TRAINING_ARGS.get("save_steps", 500),
-        eval_steps=TRAINING_ARGS.get("eval_steps", 500),
-        save_total_limit=TRAINING_ARGS.get("save_total_limit", 2),
-        evaluation_strategy="steps",
-        load_best_model_at_end=True,
-        metric_for_best_model="f1",
-        greater_is_better=True,
-        fp16=TRAINING_ARGS.get("fp16", False),
-        use_mps_device=TRAINING_ARGS.get("use_mps_device", True),
-        dataloader_num_workers=TRAINING_ARGS.get("dataloader_num_workers", 0),
-        dataloader_pin_memory=TRAINING_ARGS.get("dataloader_pin_memory", False),
-        report_to=None,  # Disable wandb/tensorboard logging
+    train_dataset = train_dataset.map(
+        tokenize_function,
+        batched=True,
+        num_proc=tokenize_num_proc(train_dataset),
+        load_from_cache_file=True,
+        cache_file_name=tokenized_cache_file("train", tokenizer)
+    )
+    val_dataset = val_dataset.map(
+        tokenize_function,
+        batched=True,
+        num_proc=tokenize_num_proc(val_dataset),
+        load_from_cache_file=True,
+        cache_file_name=tokenized_cache_file("val", tokenizer)
     )
     
+    # Set up training arguments; config values override the defaults and any key
+    # TrainingArguments accepts is passed through (e.g. lr_scheduler_type, max_grad_norm).
+    # Keys it no longer accepts (e.g. use_mps_device) are dropped, and the settings below
+    # that best-model selection and mixed precision depend on always win
+    accepted_keys = {field.name for field in fields(TrainingArguments) if field.init}
+    training_config = {**DEFAULT_TRAINING_ARGS, "dataloader_pin_memory": device.type == "cuda", **TRAINING_ARGS}
+    training_config = {key: value for key, value in training_config.items() if key in accepted_keys}
+    training_args = TrainingArguments(**{
+        **training_config,
+        "output_dir": OUTPUT_DIR,
+        "eval_strategy": "steps",
+        "save_strategy": "steps",
+        "load_best_model_at_end": True,
+        "metric_for_best_model": "f1",
+        "greater_is_better": True,
+        "bf16": bf16,
+        "fp16": fp16,
+        "group_by_length": True,  # Batch similar-length examples to minimize padding
+        "report_to": None,  # Disable wandb/tensorboard logging
+    })
+    
     # Initialize trainer
     trainer = Trainer(
         model=model,
@@ -199,6 +269,7 @@ def finetune_model():
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
         tokenizer=tokenizer,
+        data_collator=DataCollatorWithPadding(tokenizer, pad_to_multiple_of=PAD_TO_MULTIPLE_OF),
         compute_metrics=compute_metrics,
     )
     
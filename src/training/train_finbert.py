@@ -8,7 +8,6 @@ Date: 2025
 import os
 import json
 import torch
-from pathlib import Path
 import sys
 from datetime import datetime
 from typing import List, Dict, Any, Tuple, Optional
@@ -19,12 +18,11 @@ from sklearn.model_selection import train_test_split
 import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer, DataCollatorWithPadding
 from datasets import Dataset
+from datasets.fingerprint import Hasher
 import logging
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, classification_report
 import random
 
-# Add src to Python path for imports
-sys.path.append(str(Path(__file__).parent.parent.parent))
 from src.utils.config_utils import load_config
 
 # Set up logging
@@ -44,7 +42,12 @@ except Exception as e:
 # Constants
 TRAINING_DATA_PATH = "data/processed/wealth_data/training_data.csv"
 MAX_LENGTH = 512  # FinBERT can handle longer sequences
+PAD_TO_MULTIPLE_OF = 8  # Keeps padded batch shapes aligned for tensor-core / MPS kernels
 LABEL_MAPPING = {"negative": 0, "neutral": 1, "positive": 2}
+VALIDATION_SIZE = 0.2  # Fraction of examples held out for validation
+SPLIT_SEED = 42
+TOKENIZE_NUM_PROC = min(8, os.cpu_count() or 1)  # Processes for the first, uncached tokenization pass
+TOKENIZE_PARALLEL_MIN_EXAMPLES = 10_000  # Smaller splits tokenize faster in a single process
 
 def get_device():
     """Get the appropriate device for training based on system capabilities."""
@@ -67,7 +70,12 @@ def load_training_data() -> pd.DataFrame:
     if not os.path.exists(TRAINING_DATA_PATH):
         raise FileNotFoundError(f"Training data not found at {TRAINING_DATA_PATH}")
     
-    df = pd.read_csv(TRAINING_DATA_PATH)
+    # Only parse the columns training uses; labels/sources are stored as categories
+    df = pd.read_csv(
+        TRAINING_DATA_PATH,
+        usecols=["text", "label", "source"],
+        dtype={"text": "string", "label": "category", "source": "category"}
+    )
     logger.info(f"Loaded {len(df)} training examples")
     
     # Display data distribution
@@ -88,8 +96,8 @@ def prepare_dataset(df: pd.DataFrame) -> Tuple[Dataset, Dataset]:
     # Split into train and validation sets
     train_df, val_df = train_test_split(
         df, 
-        test_size=0.2, 
-        random_state=42, 
+        test_size=VALIDATION_SIZE, 
+        random_state=SPLIT_SEED, 
         stratify=df['label_id']
     )
     
@@ -112,21 +120,31 @@ def prepare_dataset(df: pd.DataFrame) -> Tuple[Dataset, Dataset]:
 
 def preprocess_function(examples: Dict[str, Any], tokenizer: AutoTokenizer) -> Dict[str, Any]:
     """Tokenize and prepare examples for the model."""
-    # Tokenize the texts
-    tokenized = tokenizer(
+    # Tokenize the texts without padding; the data collator pads each batch
+    # only to its own longest sequence
+    return tokenizer(
         examples["text"],
         truncation=True,
-        padding="max_length",
-        max_length=MAX_LENGTH,
-        return_tensors="pt"
+        max_length=MAX_LENGTH
     )
+
+def tokenized_cache_file(split: str, tokenizer: AutoTokenizer) -> str:
+    """
+    Get the Arrow file a tokenized split is cached in between runs.
     
-    # Remove the batch dimension added by return_tensors="pt"
-    for key in tokenized:
-        if isinstance(tokenized[key], torch.Tensor):
-            tokenized[key] = tokenized[key].squeeze(0)
-    
-    return tokenized
+    datasets skips its fingerprint check when given an explicit cache file, so the name
+    hashes everything the split depends on: the model, max length, training data mtime,
+    split parameters, tokenizer contents and the code that prepares and tokenizes it.
+    """
+    fingerprint = Hasher.hash((
+        MODEL_NAME, MAX_LENGTH, os.path.getmtime(TRAINING_DATA_PATH), VALIDATION_SIZE, SPLIT_SEED,
+        tokenizer, prepare_dataset, preprocess_function
+    ))
+    return os.path.join(os.path.dirname(TRAINING_DATA_PATH), f"tok_{split}_{fingerprint[:12]}.arrow")
+
+def tokenize_num_proc(dataset: Dataset) -> Optional[int]:
+    """Get the number of processes to tokenize a split with; small splits stay in-process."""
+    return TOKENIZE_NUM_PROC if len(dataset) >= TOKENIZE_PARALLEL_MIN_EXAMPLES else None
 
 def compute_metrics(pred):
     """Compute evaluation metrics."""
@@ -180,8 +198,20 @@ def finetune_model():
     def tokenize_function(examples):
         return preprocess_function(examples, tokenizer)
     
-    train_dataset = train_dataset.map(tokenize_function, batched=True)
-    val_dataset = val_dataset.map(tokenize_function, batched=True)
+    train_dataset = train_dataset.map(
+        tokenize_function,
+        batched=True,
+        num_proc=tokenize_num_proc(train_dataset),
+        load_from_cache_file=True,
+        cache_file_name=tokenized_cache_file("train", tokenizer)
+    )
+    val_dataset = val_dataset.map(
+        tokenize_function,
+        batched=True,
+        num_proc=tokenize_num_proc(val_dataset),
+        load_from_cache_file=True,
+        cache_file_name=tokenized_cache_file("val", tokenizer)
+    )
     
     # Set up training arguments
     logger.info("Setting up training arguments...")
@@ -199,9 +229,10 @@ def finetune_model():
         eval_steps=TRAINING_ARGS.get("eval_steps", 500),
         save_total_limit=TRAINING_ARGS.get("save_total_limit", 2),
         fp16=TRAINING_ARGS.get("fp16", False),
-        use_mps_device=False,  # Force CPU
+        use_cpu=True,  # Force CPU
         dataloader_num_workers=TRAINING_ARGS.get("dataloader_num_workers", 0),
         dataloader_pin_memory=TRAINING_ARGS.get("dataloader_pin_memory", False),
+        group_by_length=True,  # Batch similar-length examples to minimize padding
         report_to=None  # Disable wandb/tensorboard logging
     )
     
@@ -213,6 +244,7 @@ def finetune_model():
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
         tokenizer=tokenizer,
+        data_collator=DataCollatorWithPadding(tokenizer, pad_to_multiple_of=PAD_TO_MULTIPLE_OF),
         compute_metrics=compute_metrics,
     )
     
@@ -1,9 +1,114 @@
 """
 Utility functions for API interactions.
 """
+import asyncio
+import aiohttp
+import functools
+import threading
 import requests
 import time
 from pathlib import Path
+from typing import List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# (connect, read) timeouts in seconds for make_api_request
+REQUEST_TIMEOUT = (5, 30)
+
+# Response statuses make_api_request retries
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiting how many async requests start per second.
+    
+    Use as an async context manager around each request:
+    `async with limiter: ...`
+    
+    Args:
+        rate (float): Tokens added to the bucket per second
+        capacity (float, optional): Maximum burst size, defaults to rate
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how many blocking requests start per second.
+    
+    Use as a context manager around each request:
+    `with limiter: ...`
+    
+    Args:
+        rate (float): Tokens added to the bucket per second
+        capacity (float, optional): Maximum burst size, defaults to rate
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available and take it."""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) / self.rate)
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+def create_session(headers=None, pool_connections=4, pool_maxsize=20):
+    """
+    Create a requests Session whose HTTPS connections are pooled and kept alive.
+    
+    Args:
+        headers (dict, optional): Headers sent with every request
+        pool_connections (int): Number of per-host connection pools to cache
+        pool_maxsize (int): Maximum connections kept open per host
+    
+    Returns:
+        requests.Session: Session to reuse for all calls to the same API
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize))
+    if headers:
+        session.headers.update(headers)
+    return session
 
 def get_headers(user_agent):
     """Get headers required by various APIs."""
@@ -12,6 +117,35 @@ def get_headers(user_agent):
         "Accept-Encoding": "gzip, deflate"
     }
 
+@functools.lru_cache(maxsize=None)
+def get_retry_session(max_retries=3, retry_delay=1):
+    """
+    Get a shared keep-alive Session that retries failed GETs with exponential backoff.
+    
+    Retries connection errors and 429/5xx responses, waiting retry_delay * 2**attempt
+    seconds between attempts unless the server sends a Retry-After header.
+    
+    Args:
+        max_retries (int): Maximum number of retry attempts
+        retry_delay (float): Base delay between retries in seconds
+    
+    Returns:
+        requests.Session: Session shared by every caller with the same retry settings
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=retry_delay,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+        raise_on_status=False  # Hand the last response back instead of raising
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 def make_api_request(url, headers, params=None, max_retries=3, retry_delay=1, rate_limit=0.1):
     """
     Make an API request with proper rate limiting and retry logic.
@@ -21,34 +155,89 @@ def make_api_request(url, headers, params=None, max_retries=3, retry_delay=1, ra
         headers (dict): Request headers
         params (dict, optional): Query parameters
         max_retries (int): Maximum number of retry attempts
-        retry_delay (int): Delay between retries in seconds
+        retry_delay (int): Base delay between retries in seconds, doubled on each attempt
         rate_limit (float): Minimum time between requests in seconds
     
     Returns:
         dict/None: JSON response if successful, None if failed
     """
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:  # Too Many Requests
-                print(f"Rate limit hit. Waiting before retry...")
-                time.sleep(retry_delay)
-                continue
-            else:
-                print(f"Request failed. Status: {response.status_code}")
-                return None
-                
-        except Exception as e:
-            print(f"Error making request: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                continue
+    session = get_retry_session(max_retries, retry_delay)
+    try:
+        response = session.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 429:  # Too Many Requests
+            print(f"Rate limit hit. Giving up after {max_retries} retries.")
+            return None
+        else:
+            print(f"Request failed. Status: {response.status_code}")
             return None
             
-        finally:
-            time.sleep(rate_limit)
+    except Exception as e:
+        print(f"Error making request: {e}")
+        return None
+        
+    finally:
+        time.sleep(rate_limit)
+
+async def fetch_json(session, limiter, semaphore, url, params, max_retries, retry_delay):
+    """
+    GET one JSON endpoint for make_api_request_many, retrying like make_api_request.
+    
+    Returns:
+        dict/None: JSON response if successful, None if failed
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.acquire()
+                async with session.get(url, params=params) as response:
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+                    if response.status not in RETRY_STATUSES:
+                        print(f"Request failed. Status: {response.status}")
+                        return None
+                    retry_after = response.headers.get("Retry-After", "")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error making request: {e}")
+            retry_after = ""
+        
+        if attempt < max_retries:
+            # Back off outside the semaphore so other requests keep going
+            delay = float(retry_after) if retry_after.isdigit() else retry_delay * 2 ** attempt
+            await asyncio.sleep(delay)
+    
+    print(f"Request failed after {max_retries} retries: {url}")
+    return None
+
+async def make_api_request_many(endpoints: List[Tuple[str, Optional[dict]]], headers, rate_limit=0.1,
+                                concurrency=8, max_retries=3, retry_delay=1):
+    """
+    Make many independent API requests concurrently.
+    
+    Requests start at most once every rate_limit seconds, with up to concurrency in
+    flight at a time. Sync callers can use asyncio.run(make_api_request_many(...)).
+    
+    Args:
+        endpoints (list): (url, params) pairs to GET
+        headers (dict): Request headers
+        rate_limit (float): Minimum time between request starts in seconds
+        concurrency (int): Maximum number of requests in flight
+        max_retries (int): Maximum number of retry attempts per request
+        retry_delay (int): Base delay between retries in seconds, doubled on each attempt
+    
+    Returns:
+        list: JSON response or None for each request, in the same order
+    """
+    limiter = AsyncRateLimiter(1 / rate_limit, capacity=1) if rate_limit > 0 else None
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit_per_host=concurrency)
+    timeout = aiohttp.ClientTimeout(connect=REQUEST_TIMEOUT[0], sock_read=REQUEST_TIMEOUT[1])
     
-    return None 
\ No newline at end of file
+    async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+        return await asyncio.gather(*(
+            fetch_json(session, limiter, semaphore, url, params, max_retries, retry_delay)
+            for url, params in endpoints
+        ))
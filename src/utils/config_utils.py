@@ -3,81 +3,119 @@ Secure configuration management utilities.
 """
 import os
 import json
+import orjson
+import functools
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 import logging
-import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from src.utils.secure_data_utils import (
+    derive_fernet_key, get_fernet_cipher, pack_salted, unpack_salted, write_private_file
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the scripts that use this module
 logger = logging.getLogger(__name__)
 
 class ConfigError(Exception):
     """Custom exception for configuration errors."""
     pass
 
+# Configs loaded by get_config, by path, with the mtime of the file they were read from
+CONFIG_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
 def generate_key(password: str, salt: bytes = None) -> tuple:
     """Generate encryption key from password."""
     if salt is None:
         salt = os.urandom(16)
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=100000,
-    )
-    key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-    return key, salt
+    return derive_fernet_key(password, salt), salt
 
 def encrypt_config(config: Dict[str, Any], key: bytes) -> bytes:
     """Encrypt configuration data."""
-    f = Fernet(key)
-    return f.encrypt(json.dumps(config).encode())
+    f = get_fernet_cipher(key)
+    return f.encrypt(orjson.dumps(config, option=orjson.OPT_NON_STR_KEYS))
 
 def decrypt_config(encrypted_data: bytes, key: bytes) -> Dict[str, Any]:
     """Decrypt configuration data."""
-    f = Fernet(key)
-    return json.loads(f.decrypt(encrypted_data).decode())
+    f = get_fernet_cipher(key)
+    return orjson.loads(f.decrypt(encrypted_data))
 
+@functools.lru_cache(maxsize=None)
 def load_config(config_path: str = None) -> Dict[str, Any]:
-    """Load and decrypt configuration securely."""
+    """
+    Load and decrypt configuration securely.
+    
+    The result is cached per path and shared by every caller in the process, so it
+    must not be mutated; call load_config.cache_clear() to pick up changes on disk.
+    """
     try:
         if config_path is None:
             config_path = "config/config.json"
         
-        # Check if encrypted config exists
+        # Use the encrypted config if it exists; opening it directly avoids a
+        # separate existence check
         encrypted_path = f"{config_path}.enc"
-        if os.path.exists(encrypted_path):
+        try:
+            with open(encrypted_path, "rb") as f:
+                encrypted_data = f.read()
+        except FileNotFoundError:
+            encrypted_data = None
+        
+        if encrypted_data is not None:
             # Get encryption key from environment
             password = os.getenv("CONFIG_PASSWORD")
             if not password:
                 raise ConfigError("CONFIG_PASSWORD environment variable not set")
             
-            # Load salt
-            salt_path = f"{config_path}.salt"
-            if not os.path.exists(salt_path):
-                raise ConfigError("Salt file not found")
-            
-            with open(salt_path, "rb") as f:
-                salt = f.read()
+            # Load salt, from a separate .salt file for configs saved by older versions
+            salted = unpack_salted(encrypted_data)
+            if salted is not None:
+                salt, encrypted_data = salted
+            else:
+                salt_path = f"{config_path}.salt"
+                try:
+                    with open(salt_path, "rb") as f:
+                        salt = f.read()
+                except FileNotFoundError:
+                    raise ConfigError("Salt file not found")
             
             # Generate key and decrypt
             key, _ = generate_key(password, salt)
-            with open(encrypted_path, "rb") as f:
-                encrypted_data = f.read()
             return decrypt_config(encrypted_data, key)
         
         # Fallback to unencrypted config
-        with open(config_path, "r") as f:
-            return json.load(f)
+        with open(config_path, "rb") as f:
+            return orjson.loads(f.read())
             
     except Exception as e:
-        logger.error(f"Error loading configuration: {e}")
+        logger.error("Error loading configuration: %s", e)
         raise ConfigError(f"Failed to load configuration: {e}")
 
+def get_config(config_path: str = None) -> Dict[str, Any]:
+    """
+    Get the configuration, loading it again only when the file on disk has changed.
+    
+    Costs one stat call when the file is unchanged. Like load_config, the result is
+    shared and must not be mutated.
+    """
+    if config_path is None:
+        config_path = "config/config.json"
+    
+    # load_config prefers the encrypted file when both exist
+    try:
+        mtime = os.stat(f"{config_path}.enc").st_mtime_ns
+    except FileNotFoundError:
+        try:
+            mtime = os.stat(config_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+    
+    cached = CONFIG_CACHE.get(config_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    config = load_config.__wrapped__(config_path)
+    CONFIG_CACHE[config_path] = (mtime, config)
+    return config
+
 def save_config(config: Dict[str, Any], config_path: str = None, password: str = None) -> None:
     """Save configuration securely with encryption."""
     try:
@@ -88,16 +126,15 @@ def save_config(config: Dict[str, Any], config_path: str = None, password: str =
             # Generate new salt and key
             key, salt = generate_key(password)
             
-            # Save salt
-            salt_path = f"{config_path}.salt"
-            with open(salt_path, "wb") as f:
-                f.write(salt)
-            
-            # Encrypt and save config
+            # Encrypt and save config, with its salt in the same file
             encrypted_data = encrypt_config(config, key)
             encrypted_path = f"{config_path}.enc"
-            with open(encrypted_path, "wb") as f:
-                f.write(encrypted_data)
+            write_private_file(encrypted_path, pack_salted(salt, encrypted_data))
+            
+            # Remove the salt file of an older save, which is no longer used
+            salt_path = f"{config_path}.salt"
+            if os.path.exists(salt_path):
+                os.remove(salt_path)
             
             # Remove unencrypted config if it exists
             if os.path.exists(config_path):
@@ -108,12 +145,19 @@ def save_config(config: Dict[str, Any], config_path: str = None, password: str =
                 json.dump(config, f, indent=4)
                 
     except Exception as e:
-        logger.error(f"Error saving configuration: {e}")
+        logger.error("Error saving configuration: %s", e)
         raise ConfigError(f"Failed to save configuration: {e}")
+    finally:
+        # Later loads must see what was just written
+        load_config.cache_clear()
+        CONFIG_CACHE.clear()
 
-def get_api_key(config: Dict[str, Any], service: str) -> str:
-    """Get API key securely."""
+def get_api_key(config: Optional[Dict[str, Any]], service: str) -> str:
+    """Get API key securely; pass config=None to use get_config()."""
     try:
+        if config is None:
+            config = get_config()
+        
         if "api_keys" not in config:
             raise ConfigError("API keys not found in configuration")
         
@@ -122,12 +166,15 @@ def get_api_key(config: Dict[str, Any], service: str) -> str:
         
         return config["api_keys"][service]
     except Exception as e:
-        logger.error(f"Error getting API key: {e}")
+        logger.error("Error getting API key: %s", e)
         raise ConfigError(f"Failed to get API key: {e}")
 
-def get_user_agent(config: Dict[str, Any], service: str) -> str:
-    """Get user agent string securely."""
+def get_user_agent(config: Optional[Dict[str, Any]], service: str) -> str:
+    """Get user agent string securely; pass config=None to use get_config()."""
     try:
+        if config is None:
+            config = get_config()
+        
         if "user_agents" not in config:
             raise ConfigError("User agents not found in configuration")
         
@@ -136,12 +183,15 @@ def get_user_agent(config: Dict[str, Any], service: str) -> str:
         
         return config["user_agents"][service]
     except Exception as e:
-        logger.error(f"Error getting user agent: {e}")
+        logger.error("Error getting user agent: %s", e)
         raise ConfigError(f"Failed to get user agent: {e}")
 
-def get_rate_limit(config: Dict[str, Any], service: str) -> float:
-    """Get rate limit securely."""
+def get_rate_limit(config: Optional[Dict[str, Any]], service: str) -> float:
+    """Get rate limit securely; pass config=None to use get_config()."""
     try:
+        if config is None:
+            config = get_config()
+        
         if "rate_limits" not in config:
             raise ConfigError("Rate limits not found in configuration")
         
@@ -150,5 +200,5 @@ def get_rate_limit(config: Dict[str, Any], service: str) -> float:
         
         return float(config["rate_limits"][service])
     except Exception as e:
-        logger.error(f"Error getting rate limit: {e}")
+        logger.error("Error getting rate limit: %s", e)
         raise ConfigError(f"Failed to get rate limit: {e}") 
\ No newline at end of file
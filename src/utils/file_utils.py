@@ -2,7 +2,7 @@
 Utility functions for file operations.
 """
 import os
-import json
+import orjson
 from pathlib import Path
 
 def ensure_directory(directory):
@@ -14,16 +14,20 @@ def ensure_directory(directory):
     """
     Path(directory).mkdir(parents=True, exist_ok=True)
 
-def save_json(data, filepath):
+def save_json(data, filepath, durable=False):
     """
     Save data to a JSON file.
     
     Args:
         data (dict): Data to save
         filepath (str/Path): Path to save the JSON file
+        durable (bool): fsync the file before returning
     """
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    with open(filepath, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
 
 def load_json(filepath):
     """
@@ -36,21 +40,25 @@ def load_json(filepath):
         dict: Loaded data or None if file doesn't exist
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
     except FileNotFoundError:
         return None
 
-def save_text(text, filepath):
+def save_text(text, filepath, durable=False):
     """
     Save text to a file.
     
     Args:
         text (str): Text to save
         filepath (str/Path): Path to save the text file
+        durable (bool): fsync the file before returning
     """
     with open(filepath, 'w', encoding='utf-8') as f:
         f.write(text)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
 
 def load_text(filepath):
     """
@@ -66,4 +74,48 @@ def load_text(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
     except FileNotFoundError:
-        return None 
\ No newline at end of file
+        return None
+
+def count_files(directory, extensions):
+    """
+    Count files in a directory whose names end with one of the given extensions.
+    
+    Args:
+        directory (str/Path): Directory to scan (not recursive)
+        extensions (tuple): File extensions to match, e.g. ('.json', '.txt')
+    
+    Returns:
+        int: Number of matching files, 0 if the directory doesn't exist
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return sum(1 for entry in entries if entry.name.endswith(extensions) and entry.is_file())
+    except FileNotFoundError:
+        return 0
+
+def prefetch_files(filepaths, length=0):
+    """
+    Ask the kernel to start reading files into the page cache in the background.
+    
+    The hints for all files are issued up front, so the reads are queued to the disk
+    together instead of one at a time as each file is opened. Does nothing on
+    platforms without posix_fadvise.
+    
+    Args:
+        filepaths (iterable): Paths of the files that are about to be read
+        length (int): Bytes to prefetch from the start of each file; 0 prefetches whole files
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    
+    for filepath in filepaths:
+        try:
+            fd = os.open(filepath, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,157 @@
+"""
+On-disk cache for JSON API responses.
+"""
+import os
+import time
+import hashlib
+import orjson
+import requests
+from datetime import timedelta
+from pathlib import Path
+
+# Directory where cached responses are stored
+CACHE_DIR = Path(".cache/http")
+
+# Query parameters that never affect the response body and must not be part of the key
+IGNORED_PARAMS = {"api_key"}
+
+def cache_path(url, params=None):
+    """
+    Get the cache file path for a request.
+
+    Args:
+        url (str): Request URL
+        params (dict, optional): Query parameters
+
+    Returns:
+        Path: File the response is cached in
+    """
+    key = url
+    if params:
+        key += "?" + "&".join(
+            f"{name}={value}" for name, value in sorted(params.items()) if name not in IGNORED_PARAMS
+        )
+    return CACHE_DIR / f"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}.json"
+
+def read_cache(url, params=None, ttl=timedelta(days=1)):
+    """
+    Load a cached response if it is younger than ttl.
+
+    Args:
+        url (str): Request URL
+        params (dict, optional): Query parameters
+        ttl (timedelta/None): Maximum age of the entry, or None to accept any age
+
+    Returns:
+        dict/None: Cached JSON data, or None on a miss or expired entry
+    """
+    path = cache_path(url, params)
+    try:
+        if ttl is not None and time.time() - path.stat().st_mtime > ttl.total_seconds():
+            return None
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+def write_cache(url, params, data, headers=None):
+    """
+    Store a JSON response in the cache.
+
+    Args:
+        url (str): Request URL
+        params (dict): Query parameters
+        data (dict): Parsed JSON response
+        headers (Mapping, optional): Response headers; their ETag / Last-Modified
+            validators are kept so the entry can be revalidated with a conditional GET
+    """
+    path = cache_path(url, params)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(data))
+    os.replace(tmp_path, path)
+    
+    validators = {
+        name: headers[name] for name in ("ETag", "Last-Modified") if headers and name in headers
+    }
+    validators_path = path.with_suffix(".validators")
+    if validators:
+        with open(validators_path, 'wb') as f:
+            f.write(orjson.dumps(validators))
+    else:
+        validators_path.unlink(missing_ok=True)
+
+def conditional_headers(url, params=None):
+    """
+    Get If-None-Match / If-Modified-Since headers for revalidating a cached response.
+
+    Returns:
+        dict: Request headers, empty if nothing usable is cached
+    """
+    path = cache_path(url, params)
+    if not path.exists():
+        return {}
+    try:
+        with open(path.with_suffix(".validators"), 'rb') as f:
+            validators = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+    
+    headers = {}
+    if "ETag" in validators:
+        headers["If-None-Match"] = validators["ETag"]
+    if "Last-Modified" in validators:
+        headers["If-Modified-Since"] = validators["Last-Modified"]
+    return headers
+
+def revalidate_cache(url, params=None):
+    """
+    Mark a cached response as fresh again after the server answered 304 Not Modified.
+
+    Returns:
+        dict/None: Cached JSON data, or None if the entry has disappeared
+    """
+    path = cache_path(url, params)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return read_cache(url, params, ttl=None)
+
+def cached_get(session, url, params=None, ttl=timedelta(days=1), force_refresh=False, rate_limiter=None, **kwargs):
+    """
+    GET a JSON endpoint, serving the response from disk while it is younger than ttl.
+
+    Args:
+        session (requests.Session): Session to make the request with on a miss
+        url (str): Request URL
+        params (dict, optional): Query parameters
+        ttl (timedelta): How long a cached response stays valid
+        force_refresh (bool): Skip the cache and always hit the network
+        rate_limiter (RateLimiter, optional): Acquired before each network request,
+            so responses served from the cache don't use up the rate limit
+        **kwargs: Extra arguments passed to session.get
+
+    Returns:
+        dict: Parsed JSON response
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails
+    """
+    if not force_refresh:
+        data = read_cache(url, params, ttl)
+        if data is not None:
+            return data
+
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    response = session.get(url, params=params, **kwargs)
+    response.raise_for_status()
+    try:
+        data = orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        # Surface bad payloads the same way response.json() would
+        raise requests.exceptions.InvalidJSONError(str(e), response=response)
+    write_cache(url, params, data)
+    return data
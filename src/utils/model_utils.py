@@ -0,0 +1,220 @@
+"""
+Utility functions for loading the fine-tuned model for inference.
+"""
+import os
+import functools
+import hashlib
+from pathlib import Path
+
+# Size thread pools before torch/numpy start them. Defaults to roughly the number of
+# physical cores; override with TORCH_THREADS.
+NUM_THREADS = int(os.environ.get("TORCH_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+os.environ.setdefault("OMP_NUM_THREADS", str(NUM_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(NUM_THREADS))
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, BatchEncoding
+
+# Directory where the optimized ONNX export of the fine-tuned model is saved
+ONNX_MODEL_PATH = "data/finetuned_models/financial_llm_onnx"
+
+# Directory where tokenized inputs are cached between runs
+TOKENIZED_CACHE_DIR = "data/cache/tokenized"
+
+def configure_torch_threads():
+    """
+    Size torch's thread pools for inference. Called by the entry points rather than on
+    import, so importing this module doesn't change the threading of the importer.
+    """
+    torch.set_num_threads(NUM_THREADS)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable once, before any inter-op parallel work has started
+        pass
+
+def get_device():
+    """Get the appropriate device for inference based on system capabilities."""
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    elif torch.backends.mps.is_available():
+        return torch.device("mps")
+    else:
+        return torch.device("cpu")
+
+def get_inference_dtype(device):
+    """Get the reduced-precision dtype to run inference with on a device."""
+    if device.type in ("cuda", "mps"):
+        return torch.float16
+    # CPU keeps float32 weights so the Linear layers can be quantized to INT8
+    return torch.float32
+
+@functools.lru_cache(maxsize=1)
+def get_model_and_tokenizer(model_path):
+    """
+    Load a sequence classification model and its tokenizer once per process.
+
+    Args:
+        model_path (str): Path to the saved model directory
+
+    Returns:
+        tuple: (model, tokenizer) with the model in eval mode on the inference device
+    """
+    device = get_device()
+    tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_path,
+        torch_dtype="auto",
+        low_cpu_mem_usage=True,
+        attn_implementation="sdpa"  # Fused scaled-dot-product attention
+    )
+    model = model.to(device=device, dtype=get_inference_dtype(device)).eval()
+    
+    # Dynamic INT8 quantization of the Linear layers speeds up CPU inference
+    if device.type == "cpu":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif device.type == "cuda":
+        # Capture the forward into fused kernels / CUDA graphs; batch shapes vary with
+        # length-sorted batching, so compile with dynamic shapes
+        model = torch.compile(model, mode="reduce-overhead", dynamic=True)
+    return model, tokenizer
+
+# Weight files of a saved PyTorch model
+MODEL_WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+def onnx_export_is_current(onnx_path, model_path):
+    """
+    Check whether an ONNX export is newer than the weights of the model it was exported from.
+    
+    An export older than the fine-tuned weights was made before the model was last
+    retrained, and would quietly give results for the old model.
+    
+    Args:
+        onnx_path (str): Path to a model exported by src/analysis/export_onnx.py
+        model_path (str): Path to the saved PyTorch model directory
+    
+    Returns:
+        bool: True if the export exists and is up to date
+    """
+    onnx_file = Path(onnx_path) / "model_optimized.onnx"
+    if not onnx_file.exists():
+        return False
+    weight_mtimes = [
+        weights.stat().st_mtime for weights in map(Path(model_path).joinpath, MODEL_WEIGHT_FILES) if weights.exists()
+    ]
+    return not weight_mtimes or onnx_file.stat().st_mtime >= max(weight_mtimes)
+
+@functools.lru_cache(maxsize=1)
+def get_onnx_model_and_tokenizer(onnx_path):
+    """
+    Load an ONNX Runtime sequence classification model and its tokenizer once per process.
+    
+    Args:
+        onnx_path (str): Path to a model exported by src/analysis/export_onnx.py
+    
+    Returns:
+        tuple: (model, tokenizer) backed by an ONNX Runtime inference session
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    
+    if torch.cuda.is_available():
+        provider, file_name = "CUDAExecutionProvider", "model_optimized.onnx"
+    else:
+        # Use the INT8 graph on CPU when the export step produced one
+        provider, file_name = "CPUExecutionProvider", "model_optimized_quantized.onnx"
+        if not (Path(onnx_path) / file_name).exists():
+            file_name = "model_optimized.onnx"
+    
+    tokenizer = AutoTokenizer.from_pretrained(onnx_path, use_fast=True)
+    model = ORTModelForSequenceClassification.from_pretrained(
+        onnx_path,
+        file_name=file_name,
+        provider=provider
+    )
+    return model, tokenizer
+
+# Files that define how a saved tokenizer splits text
+TOKENIZER_FILES = (
+    "tokenizer.json", "vocab.txt", "tokenizer_config.json", "special_tokens_map.json", "added_tokens.json"
+)
+
+def tokenizer_fingerprint(tokenizer):
+    """
+    Describe a tokenizer for use in cache keys.
+    
+    Includes the modification time and size of each file of a tokenizer saved on
+    disk, so re-saving it (e.g. after retraining into the same directory with a
+    different vocab or special tokens) changes the fingerprint.
+    
+    Args:
+        tokenizer: Tokenizer to describe
+    
+    Returns:
+        str: Fingerprint that changes whenever the tokenizer's files do
+    """
+    parts = [tokenizer.name_or_path, str(len(tokenizer))]
+    for name in TOKENIZER_FILES:
+        try:
+            stat = (Path(tokenizer.name_or_path) / name).stat()
+        except OSError:
+            continue
+        parts.append(f"{name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "\0".join(parts)
+
+def tokenize_cached(texts, tokenizer, max_length=512):
+    """
+    Tokenize a list of texts, reusing tensors cached on disk by a previous run.
+    
+    Args:
+        texts (list): Texts to tokenize
+        tokenizer: Tokenizer to apply
+        max_length (int): Maximum sequence length
+    
+    Returns:
+        BatchEncoding: Padded and truncated PyTorch tensors
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{tokenizer_fingerprint(tokenizer)}\0{max_length}".encode())
+    for text in texts:
+        digest.update(b"\0" + text.encode())
+    cache_path = Path(TOKENIZED_CACHE_DIR) / f"{digest.hexdigest()}.pt"
+    
+    if cache_path.exists():
+        return BatchEncoding(torch.load(cache_path, weights_only=True))
+    
+    encoding = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=max_length)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(dict(encoding), cache_path)
+    return encoding
+
+def predict_logits(texts, model, tokenizer, batch_size=32, max_length=512):
+    """
+    Run texts through the model in batches of similar token length.
+    
+    Sorting by length means each batch is only padded to its own longest
+    sequence instead of the longest sequence overall.
+    
+    Args:
+        texts (list): Texts to classify
+        model: Sequence classification model
+        tokenizer: Tokenizer matching the model
+        batch_size (int): Maximum number of texts per forward pass
+        max_length (int): Maximum sequence length
+    
+    Returns:
+        torch.Tensor: float32 logits on the CPU, in the same order as texts
+    """
+    encoding = tokenize_cached(texts, tokenizer, max_length)
+    lengths = encoding["attention_mask"].sum(dim=1)
+    order = lengths.argsort()
+    
+    logits = torch.empty(len(texts), model.config.num_labels)
+    with torch.inference_mode():
+        for batch in order.split(batch_size):
+            # BERT tokenizers pad on the right, so trailing columns past the
+            # longest sequence in the batch are all padding
+            batch_length = int(lengths[batch].max())
+            inputs = {key: value[batch, :batch_length].to(model.device) for key, value in encoding.items()}
+            logits[batch] = model(**inputs).logits.float().cpu()
+    
+    return logits
@@ -1,103 +1,270 @@
 import os
+import io
 import json
+import atexit
+import orjson
+import functools
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 import hashlib
 import hmac
+import re
+import struct
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import rfernet  # Optional Rust Fernet implementation, faster on small payloads
+except ImportError:
+    rfernet = None
+
+# Logging is configured by the scripts that use this module
 logger = logging.getLogger(__name__)
 
 class SecureDataError(Exception):
     """Custom exception for secure data handling errors."""
     pass
 
+# Leading byte of AES-GCM blobs written by secure_save; Fernet tokens always start with b"g"
+AESGCM_FORMAT_VERSION = b"\x01"
+
+# Size of the random AES-GCM nonce stored in front of each ciphertext
+AESGCM_NONCE_SIZE = 12
+
+# Header of encrypted files that carry their salt inline, followed by the salt length
+SALTED_FILE_MAGIC = b"TRYX\x01"
+SALT_LENGTH_FORMAT = struct.Struct("<H")
+
+# Substrings that mark a key as holding sensitive data, matched case-insensitively
+SENSITIVE_FIELDS = (
+    "api_key", "password", "token", "secret", "key",
+    "credit_card", "ssn", "social_security", "account_number"
+)
+
+# Mask characters sliced by sanitize_sensitive_data rather than built per value
+MASK_STARS = "*" * 256
+
+# Finds any sensitive field in a key with one regex scan
+SENSITIVE_FIELD_PATTERN = re.compile("|".join(map(re.escape, SENSITIVE_FIELDS)), re.IGNORECASE)
+
+# Distinct keys remembered by is_sensitive_key; logged records reuse a small set of keys
+SENSITIVE_KEY_CACHE_SIZE = 4096
+
+# Write buffer for each secure_log file
+LOG_BUFFER_SIZE = 1 << 16
+
+# secure_log entries with one of these levels are flushed straight to disk, so the
+# entries explaining a crash aren't lost in the buffer with it
+FLUSH_LOG_LEVELS = frozenset({"ERROR", "CRITICAL"})
+
+# Log files opened by secure_log, kept open per path until exit
+LOG_FILES: Dict[str, io.BufferedWriter] = {}
+
+def close_log_files() -> None:
+    """Flush and close every file opened by secure_log."""
+    for f in LOG_FILES.values():
+        f.close()
+    LOG_FILES.clear()
+
+atexit.register(close_log_files)
+
+class FernetCipher:
+    """
+    Fernet encryption backed by rfernet when it is installed, falling back to
+    cryptography's implementation. Both produce the same standard Fernet tokens.
+    
+    Args:
+        key (bytes): URL-safe base64-encoded 32-byte key
+    """
+    def __init__(self, key: bytes):
+        if rfernet is not None:
+            self._fernet = rfernet.Fernet(key.decode() if isinstance(key, bytes) else key)
+        else:
+            self._fernet = Fernet(key)
+    
+    def encrypt(self, data: bytes) -> bytes:
+        """Encrypt data into a Fernet token."""
+        token = self._fernet.encrypt(data)
+        return token.encode() if isinstance(token, str) else token
+    
+    def decrypt(self, token: bytes) -> bytes:
+        """Decrypt a Fernet token."""
+        if rfernet is not None:
+            return self._fernet.decrypt(token.decode() if isinstance(token, bytes) else token)
+        return self._fernet.decrypt(token)
+
+@functools.lru_cache(maxsize=16)
+def get_fernet_cipher(key: bytes) -> FernetCipher:
+    """Get a FernetCipher for key, reusing the one built for earlier calls with the same key."""
+    return FernetCipher(key)
+
+@functools.lru_cache(maxsize=16)
+def get_aesgcm_cipher(key: bytes) -> AESGCM:
+    """Get an AES-256-GCM cipher for a URL-safe base64-encoded 32-byte key, reusing earlier ones."""
+    return AESGCM(base64.urlsafe_b64decode(key))
+
 def generate_data_key() -> bytes:
     """Generate a secure key for data encryption."""
     return Fernet.generate_key()
 
-def derive_key(password: str, salt: bytes = None) -> tuple:
-    """Derive a secure key from a password."""
-    if salt is None:
-        salt = os.urandom(16)
+@functools.lru_cache(maxsize=32)
+def derive_fernet_key(password: str, salt: bytes) -> bytes:
+    """
+    Run PBKDF2-HMAC-SHA256 to turn a password and salt into a Fernet key.
+    
+    Memoized, since the 100 000 iterations dominate every load of the same
+    encrypted file and the same password and salt always give the same key.
+    """
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
         salt=salt,
         iterations=100000,
     )
-    key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-    return key, salt
+    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+
+def derive_key(password: str, salt: bytes = None) -> tuple:
+    """Derive a secure key from a password."""
+    if salt is None:
+        salt = os.urandom(16)
+    return derive_fernet_key(password, salt), salt
 
 def encrypt_data(data: Dict[str, Any], key: bytes) -> bytes:
     """Encrypt sensitive data."""
     try:
-        f = Fernet(key)
-        return f.encrypt(json.dumps(data).encode())
+        f = get_fernet_cipher(key)
+        return f.encrypt(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
     except Exception as e:
-        logger.error(f"Error encrypting data: {e}")
+        logger.error("Error encrypting data: %s", e)
         raise SecureDataError(f"Failed to encrypt data: {e}")
 
 def decrypt_data(encrypted_data: bytes, key: bytes) -> Dict[str, Any]:
     """Decrypt sensitive data."""
     try:
-        f = Fernet(key)
-        return json.loads(f.decrypt(encrypted_data).decode())
+        f = get_fernet_cipher(key)
+        return orjson.loads(f.decrypt(encrypted_data))
     except Exception as e:
-        logger.error(f"Error decrypting data: {e}")
+        logger.error("Error decrypting data: %s", e)
         raise SecureDataError(f"Failed to decrypt data: {e}")
 
+def encrypt_data_aesgcm(data: Dict[str, Any], key: bytes) -> bytes:
+    """
+    Encrypt sensitive data with AES-256-GCM.
+    
+    Much faster than Fernet on large payloads, since OpenSSL runs it on the
+    AES-NI / carry-less multiply instructions. Returns nonce + ciphertext.
+    """
+    try:
+        nonce = os.urandom(AESGCM_NONCE_SIZE)
+        return nonce + get_aesgcm_cipher(key).encrypt(
+            nonce, orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), None
+        )
+    except Exception as e:
+        logger.error("Error encrypting data: %s", e)
+        raise SecureDataError(f"Failed to encrypt data: {e}")
+
+def decrypt_data_aesgcm(encrypted_data: bytes, key: bytes) -> Dict[str, Any]:
+    """Decrypt sensitive data encrypted by encrypt_data_aesgcm."""
+    try:
+        nonce, ciphertext = encrypted_data[:AESGCM_NONCE_SIZE], encrypted_data[AESGCM_NONCE_SIZE:]
+        return orjson.loads(get_aesgcm_cipher(key).decrypt(nonce, ciphertext, None))
+    except Exception as e:
+        logger.error("Error decrypting data: %s", e)
+        raise SecureDataError(f"Failed to decrypt data: {e}")
+
+def pack_salted(salt: bytes, encrypted_data: bytes) -> bytes:
+    """Prefix encrypted data with its salt, so both can be stored in one file."""
+    return SALTED_FILE_MAGIC + SALT_LENGTH_FORMAT.pack(len(salt)) + salt + encrypted_data
+
+def unpack_salted(data: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Split the contents of a file written with pack_salted into (salt, encrypted_data).
+    Returns None for older files, which keep their salt in a separate .salt file.
+    """
+    if not data.startswith(SALTED_FILE_MAGIC):
+        return None
+    start = len(SALTED_FILE_MAGIC) + SALT_LENGTH_FORMAT.size
+    (salt_length,) = SALT_LENGTH_FORMAT.unpack_from(data, len(SALTED_FILE_MAGIC))
+    return data[start:start + salt_length], data[start + salt_length:]
+
+def write_private_file(filepath: str, data: bytes) -> None:
+    """
+    Atomically replace a file with data, readable only by its owner.
+    
+    The data is written to a temporary file in one call and synced before being
+    renamed into place, so a crash never leaves a partial ciphertext behind.
+    """
+    tmp_path = f"{filepath}.tmp"
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_NOFOLLOW", 0)
+    fd = os.open(tmp_path, flags, 0o600)
+    with os.fdopen(fd, "wb", buffering=0) as f:
+        # Reserve the space up front so the file gets contiguous extents
+        if data and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(fd, 0, len(data))
+            except OSError:
+                pass  # Not supported by this filesystem
+        
+        view = memoryview(data)
+        while view:
+            view = view[f.write(view):]
+        os.fsync(fd)
+    os.replace(tmp_path, filepath)
+
 def secure_save(data: Dict[str, Any], filepath: str, password: str) -> None:
     """Securely save data with encryption."""
     try:
         # Generate key and salt
         key, salt = derive_key(password)
         
-        # Encrypt data
-        encrypted_data = encrypt_data(data, key)
+        # Encrypt data, tagged with a version byte so secure_load can tell it from Fernet
+        encrypted_data = AESGCM_FORMAT_VERSION + encrypt_data_aesgcm(data, key)
         
-        # Save salt
-        salt_path = f"{filepath}.salt"
-        with open(salt_path, "wb") as f:
-            f.write(salt)
+        # Save salt and encrypted data together in one write
+        write_private_file(filepath, pack_salted(salt, encrypted_data))
         
-        # Save encrypted data
-        with open(filepath, "wb") as f:
-            f.write(encrypted_data)
+        # Remove the salt file of an older save, which is no longer used
+        if os.path.exists(f"{filepath}.salt"):
+            os.remove(f"{filepath}.salt")
             
     except Exception as e:
-        logger.error(f"Error saving data securely: {e}")
+        logger.error("Error saving data securely: %s", e)
         raise SecureDataError(f"Failed to save data securely: {e}")
 
 def secure_load(filepath: str, password: str) -> Dict[str, Any]:
     """Securely load encrypted data."""
     try:
-        # Load salt
-        salt_path = f"{filepath}.salt"
-        if not os.path.exists(salt_path):
-            raise SecureDataError("Salt file not found")
+        # Load encrypted data
+        with open(filepath, "rb") as f:
+            encrypted_data = f.read()
         
-        with open(salt_path, "rb") as f:
-            salt = f.read()
+        # Load salt, from a separate .salt file for older saves
+        salted = unpack_salted(encrypted_data)
+        if salted is not None:
+            salt, encrypted_data = salted
+        else:
+            salt_path = f"{filepath}.salt"
+            try:
+                with open(salt_path, "rb") as f:
+                    salt = f.read()
+            except FileNotFoundError:
+                raise SecureDataError("Salt file not found")
         
         # Derive key
         key, _ = derive_key(password, salt)
         
-        # Load and decrypt data
-        with open(filepath, "rb") as f:
-            encrypted_data = f.read()
-        
+        # Files saved before the switch to AES-GCM hold a bare Fernet token
+        if encrypted_data.startswith(AESGCM_FORMAT_VERSION):
+            return decrypt_data_aesgcm(encrypted_data[len(AESGCM_FORMAT_VERSION):], key)
         return decrypt_data(encrypted_data, key)
         
     except Exception as e:
-        logger.error(f"Error loading data securely: {e}")
+        logger.error("Error loading data securely: %s", e)
         raise SecureDataError(f"Failed to load data securely: {e}")
 
 def verify_data_integrity(data: Dict[str, Any], signature: str) -> bool:
@@ -108,44 +275,52 @@ def verify_data_integrity(data: Dict[str, Any], signature: str) -> bool:
         if not secret_key:
             raise SecureDataError("DATA_INTEGRITY_KEY environment variable not set")
         
-        # Calculate HMAC
-        h = hmac.new(
-            secret_key.encode(),
-            json.dumps(data, sort_keys=True).encode(),
-            hashlib.sha256
-        )
-        calculated_signature = h.hexdigest()
+        try:
+            expected = bytes.fromhex(signature)
+        except ValueError:
+            return False
         
-        return hmac.compare_digest(calculated_signature, signature)
+        # Calculate HMAC, feeding the sorted-key JSON in as it is encoded rather
+        # than building the whole document first
+        h = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+        for chunk in json.JSONEncoder(sort_keys=True).iterencode(data):
+            h.update(chunk.encode())
+        
+        return hmac.compare_digest(h.digest(), expected)
         
     except Exception as e:
-        logger.error(f"Error verifying data integrity: {e}")
+        logger.error("Error verifying data integrity: %s", e)
         raise SecureDataError(f"Failed to verify data integrity: {e}")
 
+@functools.lru_cache(maxsize=SENSITIVE_KEY_CACHE_SIZE)
+def is_sensitive_key(key: str) -> bool:
+    """Check whether a key names sensitive data; decided once per distinct key."""
+    return SENSITIVE_FIELD_PATTERN.search(key) is not None
+
 def sanitize_sensitive_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """Remove or mask sensitive data."""
-    sensitive_fields = {
-        "api_key", "password", "token", "secret", "key",
-        "credit_card", "ssn", "social_security", "account_number"
-    }
+    def stars(count: int) -> str:
+        return MASK_STARS[:count] if count <= len(MASK_STARS) else "*" * count
     
     def mask_value(value: str) -> str:
         if len(value) <= 4:
-            return "*" * len(value)
-        return value[:2] + "*" * (len(value) - 4) + value[-2:]
+            return stars(len(value))
+        return f"{value[:2]}{stars(len(value) - 4)}{value[-2:]}"
     
-    def sanitize_dict(d: Dict[str, Any]) -> Dict[str, Any]:
-        result = {}
-        for key, value in d.items():
+    # Walk nested dicts with an explicit stack of (source, sanitized copy) pairs
+    result = {}
+    stack = [(data, result)]
+    while stack:
+        source, sanitized = stack.pop()
+        for key, value in source.items():
             if isinstance(value, dict):
-                result[key] = sanitize_dict(value)
-            elif isinstance(value, str) and any(field in key.lower() for field in sensitive_fields):
-                result[key] = mask_value(value)
+                sanitized[key] = {}
+                stack.append((value, sanitized[key]))
+            elif isinstance(value, str) and is_sensitive_key(key):
+                sanitized[key] = mask_value(value)
             else:
-                result[key] = value
-        return result
-    
-    return sanitize_dict(data)
+                sanitized[key] = value
+    return result
 
 def secure_log(data: Dict[str, Any], log_file: str) -> None:
     """Securely log data with sensitive information removed."""
@@ -156,11 +331,14 @@ def secure_log(data: Dict[str, Any], log_file: str) -> None:
         # Add timestamp
         sanitized_data["timestamp"] = datetime.now().isoformat()
         
-        # Log to file
-        with open(log_file, "a") as f:
-            json.dump(sanitized_data, f)
-            f.write("\n")
+        # Log to file, reusing its buffered handle instead of reopening it for every entry
+        f = LOG_FILES.get(log_file)
+        if f is None:
+            f = LOG_FILES[log_file] = open(log_file, "ab", buffering=LOG_BUFFER_SIZE)
+        f.write(orjson.dumps(sanitized_data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
+        if str(sanitized_data.get("level", "")).upper() in FLUSH_LOG_LEVELS:
+            f.flush()
             
     except Exception as e:
-        logger.error(f"Error logging data securely: {e}")
+        logger.error("Error logging data securely: %s", e)
         raise SecureDataError(f"Failed to log data securely: {e}") 
\ No newline at end of file
@@ -2,10 +2,6 @@ import os
 from pathlib import Path
 import json
 import shutil
-import sys
-
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.secure_data_utils import secure_save
 